@@ -0,0 +1,155 @@
+from field_class import Field, GameOverError, COLORS
+from fuzz_field import load_engine
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+SIZES = ((6, 13), (12, 26), (24, 52)) # (cols, rows)
+KINDS = ('empty', 'dense', 'cascade')
+CALLS = 200 # how many fresh fields each timing is taken over
+REPEATS = 5
+THRESHOLD = 0.10 # how much slower than the baseline a benchmark can get before it is a regression
+SEED = 0
+
+def make_board(kind: str, cols: int, rows: int, rand: random.Random) -> list[list[str]]:
+    '''
+    Returns a field of frozen squares:
+    'empty' has no squares, 'dense' is full of random colors except for the top 4 rows,
+    and 'cascade' is the same but with only 3 colors, so most squares are matched and the matches keep setting off more
+    '''
+    if kind == 'empty':
+        return [['   '] * rows for col in range(cols)]
+
+    colors = COLORS if kind == 'dense' else COLORS[:3]
+    return [['   '] * 4 + [f' {rand.choice(colors)} ' for row in range(rows - 4)] for col in range(cols)]
+
+def _punch_holes(board: list[list[str]], rand: random.Random) -> list[list[str]]:
+    '''Empties about a third of the squares of a board, so that there is something to drop'''
+    return [[square if rand.random() > 1 / 3 else '   ' for square in column] for column in board]
+
+def _new_field(board: list[list[str]], engine, rand: random.Random) -> Field:
+    '''Returns a field with its own copy of the board'''
+    return Field([column[:] for column in board], engine = engine, rand = rand)
+
+def _with_faller(field: Field) -> Field:
+    '''Creates a faller in the middle column, which is always empty at the top'''
+    field.create_faller(col_num = field.cols // 2 - 1)
+    return field
+
+def _with_faller_in_field(field: Field) -> Field:
+    '''Creates a faller in the middle column and passes time until all of its squares are in the field'''
+    _with_faller(field)
+    for tick in range(3):
+        field.pass_time()
+    return field
+
+def _matched(field: Field) -> Field:
+    '''Marks the matches that are already on the field'''
+    field.match_squares()
+    return field
+
+def _run_cycle(field: Field):
+    '''Passes time until the faller has frozen and every match it set off has been deleted'''
+    try:
+        field.pass_time()
+        while field.matching or not field.need_new_faller:
+            field.pass_time()
+    except GameOverError:
+        pass
+
+# each benchmark is (what to do to a new field before it is timed, what to time)
+BENCHMARKS = {
+    'match_squares': (lambda field: field, lambda field: field.match_squares()),
+    'check_for_matches': (_matched, lambda field: field.check_for_matches()),
+    'delete_matches': (_matched, lambda field: field.delete_matches()),
+    'drop_everything': (None, lambda field: field.drop_everything()),
+    '_update_field': (_with_faller_in_field, lambda field: field._update_field(field.faller.faller_col + 1)),
+    'pass_time_cycle': (_with_faller, _run_cycle),
+}
+
+def time_benchmark(name: str, kind: str, cols: int, rows: int, engine = None, calls: int = CALLS, repeats: int = REPEATS) -> dict:
+    '''Times one benchmark on new fields of one kind and size, returning the best and median microseconds per call'''
+    prepare, operation = BENCHMARKS[name]
+    rand = random.Random(f'{SEED}-{name}-{kind}-{cols}x{rows}')
+    board = make_board(kind, cols, rows, rand)
+    if prepare is None:
+        # the fields are only made once, so that dropping on one board with holes doesn't depend on the others
+        boards = [_punch_holes(board, rand) for call in range(calls)]
+        prepare = lambda field: field
+    else:
+        boards = [board] * calls
+
+    per_call = []
+    for repeat in range(repeats):
+        fields = [prepare(_new_field(board, engine, random.Random(call))) for call, board in enumerate(boards)]
+        start = time.perf_counter()
+        for field in fields:
+            operation(field)
+        per_call.append((time.perf_counter() - start) / calls * 1e6)
+    return {'best_us': min(per_call), 'median_us': statistics.median(per_call)}
+
+def run_benchmarks(engine_name: str = None, sizes = SIZES, calls: int = CALLS, repeats: int = REPEATS) -> dict:
+    '''Runs every benchmark on every kind and size of board and returns the results, named 'benchmark/kind/colsxrows' '''
+    engine = load_engine(engine_name)
+    results = {}
+    for name in BENCHMARKS:
+        for kind in KINDS:
+            for cols, rows in sizes:
+                results[f'{name}/{kind}/{cols}x{rows}'] = time_benchmark(name, kind, cols, rows, engine, calls, repeats)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'engine': engine_name,
+        'results': results
+    }
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list[tuple[str, float, float]]:
+    '''
+    Returns every benchmark whose best time got more than threshold slower than in the baseline,
+    as (name, baseline microseconds, new microseconds). The best time is used since it is the least noisy.
+    '''
+    regressions = []
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name)
+        if old is not None and result['best_us'] > old['best_us'] * (1 + threshold):
+            regressions.append((name, old['best_us'], result['best_us']))
+    return regressions
+
+def main(argv: list[str] = None) -> int:
+    '''Runs the benchmarks from the command line and returns 1 if there are any regressions'''
+    parser = argparse.ArgumentParser(description = 'Times the hot paths of Field.')
+    parser.add_argument('--engine', help = "board engine to give the field, such as 'bitboard.BitBoard'")
+    parser.add_argument('--output', help = 'JSON file to save the results in')
+    parser.add_argument('--baseline', help = 'JSON file of earlier results to compare against')
+    parser.add_argument('--threshold', type = float, default = THRESHOLD, help = 'how much slower counts as a regression')
+    parser.add_argument('--quick', action = 'store_true', help = 'only the 6x13 size with fewer calls')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        results = run_benchmarks(args.engine, SIZES[:1], CALLS // 4, 3)
+    else:
+        results = run_benchmarks(args.engine)
+
+    for name, result in results['results'].items():
+        print(f"{name:40} {result['best_us']:10.1f} us {result['median_us']:10.1f} us")
+
+    if args.output:
+        with open(args.output, 'w') as json_file:
+            json.dump(results, json_file, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as json_file:
+            baseline = json.load(json_file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new in regressions:
+            print(f'REGRESSION {name}: {old:.1f} us -> {new:.1f} us ({new / old - 1:+.0%})')
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+from field_class import COLORS
+from line_index import LINE_DIRECTIONS
+
+# the characters that surround the color of a square in each state
+FALLING_MARKS = ('[', ']')
+LANDED_MARKS = ('|', '|')
+MATCHED_MARKS = ('*', '*')
+
+class BitBoard:
+    '''
+    A field stored as one integer per color, where square (col, row) is bit col * (rows + 1) + row.
+    The extra bit at the end of each column is always 0 so that lines can't wrap from one column into the next.
+    '''
+    def __init__(self, cols: int, rows: int) -> None:
+        '''Initializes variables'''
+        self.cols = cols
+        self.rows = rows
+        self.height = rows + 1
+        self.colors = {color: 0 for color in COLORS}
+        self.occupied = 0
+        self.falling = 0
+        self.landed = 0
+        self.matched = 0
+        self.column_mask = (1 << rows) - 1
+        # how far to shift the bits to move one square in each line direction
+        self.shifts = [coldelta * self.height + rowdelta for coldelta, rowdelta in LINE_DIRECTIONS]
+    @classmethod
+    def from_field(cls, field: list[list[str]]) -> 'BitBoard':
+        '''Creates a bitboard from a field of square strings'''
+        cols = len(field)
+        rows = len(field[0]) if cols else 0
+        bitboard = cls(cols, rows)
+        for col in range(cols):
+            for row in range(rows):
+                square = field[col][row]
+                if square != '   ':
+                    bitboard.set_square(col, row, square)
+        return bitboard
+    def _bit(self, col: int, row: int) -> int:
+        '''Returns the bit of the square at (col, row)'''
+        return 1 << (col * self.height + row)
+    def set_square(self, col: int, row: int, square: str):
+        '''Puts a square string such as ' R ' or '[R]' at (col, row), which must be empty'''
+        bit = self._bit(col, row)
+        color = square[1]
+        self.colors[color] = self.colors.get(color, 0) | bit
+        self.occupied |= bit
+        if square[0] == FALLING_MARKS[0]:
+            self.falling |= bit
+        elif square[0] == LANDED_MARKS[0]:
+            self.landed |= bit
+        elif square[0] == MATCHED_MARKS[0]:
+            self.matched |= bit
+    def square_at(self, col: int, row: int) -> str:
+        '''Returns the square string at (col, row)'''
+        bit = self._bit(col, row)
+        if not self.occupied & bit:
+            return '   '
+
+        for color, bits in self.colors.items():
+            if bits & bit:
+                break
+
+        if self.matched & bit:
+            return f'{MATCHED_MARKS[0]}{color}{MATCHED_MARKS[1]}'
+        elif self.falling & bit:
+            return f'{FALLING_MARKS[0]}{color}{FALLING_MARKS[1]}'
+        elif self.landed & bit:
+            return f'{LANDED_MARKS[0]}{color}{LANDED_MARKS[1]}'
+        else:
+            return f' {color} '
+    @property
+    def field(self) -> list[list[str]]:
+        '''The bitboard as a list of columns of square strings, in the same format as Field.field'''
+        return [[self.square_at(col, row) for row in range(self.rows)] for col in range(self.cols)]
+    def find_matches(self) -> int:
+        '''Returns the bits of every square that is part of 3 or more squares of the same color in a line'''
+        found = 0
+        for bits in self.colors.values():
+            for shift in self.shifts:
+                if shift <= 0:
+                    continue # a field without any rows
+                begins = bits & (bits >> shift) & (bits >> (2 * shift))
+                found |= begins | (begins << shift) | (begins << (2 * shift))
+        return found
+    def match_squares(self) -> int:
+        '''Marks every square that is part of a match as matched and returns how many squares were newly marked'''
+        found = self.find_matches()
+        newly_matched = found & ~self.matched
+        self.matched |= found
+        return bin(newly_matched).count('1')
+    def check_for_matches(self) -> bool:
+        '''If there is a matched square, returns True. Otherwise, returns False'''
+        return self.matched != 0
+    def delete_matches(self):
+        '''Deletes all the matched squares, letting the squares above them fall into their place'''
+        for col in range(self.cols):
+            offset = col * self.height
+            matched = (self.matched >> offset) & self.column_mask
+            if matched:
+                self._compact_column(offset, ~matched & self.column_mask)
+    def drop_everything(self):
+        '''Deletes all empty squares that are underneath squares with colors in them'''
+        for col in range(self.cols):
+            offset = col * self.height
+            column = (self.occupied >> offset) & self.column_mask
+            height = bin(column).count('1')
+            compact = ((1 << height) - 1) << (self.rows - height)
+            if column != compact:
+                self._compact_column(offset, column)
+    def _compact_column(self, offset: int, keep: int):
+        '''
+        Moves the squares of one column whose bits are set in keep down to the bottom, keeping their order.
+        The squares that are not kept are deleted.
+        '''
+        moves = []
+        destination = self.rows - 1
+        for row in range(self.rows - 1, -1, -1):
+            if keep & (1 << row):
+                moves.append((row, destination))
+                destination -= 1
+
+        def compact(bits: int) -> int:
+            column_bits = (bits >> offset) & self.column_mask
+            compacted = 0
+            for source, destination in moves:
+                if column_bits & (1 << source):
+                    compacted |= 1 << destination
+            return (bits & ~(self.column_mask << offset)) | (compacted << offset)
+
+        for color in self.colors:
+            self.colors[color] = compact(self.colors[color])
+        self.occupied = compact(self.occupied)
+        self.falling = compact(self.falling)
+        self.landed = compact(self.landed)
+        self.matched = compact(self.matched)
@@ -0,0 +1,149 @@
+from field_class import COLORS
+from line_index import flat_lines
+
+# every square is stored as one byte: the top bits hold the state and the low 5 bits hold the color
+FROZEN = 0
+FALLING = 1
+LANDED = 2
+MATCHED = 3
+
+EMPTY = 0
+COLOR_MASK = 0b11111
+STATE_SHIFT = 5
+
+# the characters that surround the color of a square in each state
+_STATE_MARKS = ((' ', ' '), ('[', ']'), ('|', '|'), ('*', '*'))
+_STATES = {marks[0]: state for state, marks in enumerate(_STATE_MARKS)}
+
+# color code 0 is reserved for empty squares; the game colors always get the codes 1 to 7
+_letters = [' '] + list(COLORS)
+_color_codes = {letter: code for code, letter in enumerate(_letters)}
+
+_square_codes = {'   ': EMPTY}
+_square_strings = {EMPTY: '   '}
+
+def color_code(letter: str) -> int:
+    '''Returns the code of a color letter, giving letters that have not been seen before a new code'''
+    code = _color_codes.get(letter)
+    if code is None:
+        if len(_letters) > COLOR_MASK:
+            raise ValueError(f'Too many different colors to encode {letter!r}')
+        code = len(_letters)
+        _letters.append(letter)
+        _color_codes[letter] = code
+    return code
+
+def color_letter(code: int) -> str:
+    '''Returns the color letter of a square code'''
+    return _letters[code & COLOR_MASK]
+
+def encode_square(square: str) -> int:
+    '''Returns the one-byte code of a square string such as '   ', '[R]' or '*R*' '''
+    code = _square_codes.get(square)
+    if code is None:
+        code = (_STATES[square[0]] << STATE_SHIFT) | color_code(square[1])
+        _square_codes[square] = code
+        _square_strings[code] = square
+    return code
+
+def decode_square(code: int) -> str:
+    '''Returns the square string of a one-byte code'''
+    square = _square_strings.get(code)
+    if square is None:
+        opening, closing = _STATE_MARKS[code >> STATE_SHIFT]
+        square = f'{opening}{_letters[code & COLOR_MASK]}{closing}'
+        _square_strings[code] = square
+        _square_codes[square] = code
+    return square
+
+class Board:
+    '''
+    A field stored as a flat bytearray of square codes, column by column, so that
+    square (col, row) is at index col * rows + row
+    '''
+    __slots__ = ('cols', 'rows', 'cells')
+
+    def __init__(self, cols: int, rows: int, cells: bytearray = None) -> None:
+        '''Initializes variables'''
+        self.cols = cols
+        self.rows = rows
+        if cells is None:
+            cells = bytearray(cols * rows)
+        elif len(cells) != cols * rows:
+            raise ValueError(f'Expected {cols * rows} squares, got {len(cells)}')
+        self.cells = cells
+    @classmethod
+    def from_field(cls, field: list[list[str]]) -> 'Board':
+        '''Creates a board from a field of square strings'''
+        cols = len(field)
+        rows = len(field[0]) if cols else 0
+        cells = bytearray(cols * rows)
+        i = 0
+        for column in field:
+            for square in column:
+                cells[i] = encode_square(square)
+                i += 1
+        return cls(cols, rows, cells)
+    @property
+    def field(self) -> list[list[str]]:
+        '''The board as a list of columns of square strings, in the same format as Field.field'''
+        decode = decode_square
+        cells = self.cells
+        rows = self.rows
+        return [[decode(code) for code in cells[col * rows:(col + 1) * rows]] for col in range(self.cols)]
+    def copy(self) -> 'Board':
+        '''Returns a copy of the board'''
+        return Board(self.cols, self.rows, bytearray(self.cells))
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.cols == other.cols and self.rows == other.rows and self.cells == other.cells
+    def get(self, col: int, row: int) -> int:
+        '''Returns the code of the square at (col, row)'''
+        return self.cells[col * self.rows + row]
+    def set(self, col: int, row: int, code: int):
+        '''Changes the code of the square at (col, row)'''
+        self.cells[col * self.rows + row] = code
+    def match_squares(self) -> int:
+        '''
+        Marks every square that is part of 3 or more squares of the same color in a line as matched.
+        Returns the number of squares that were newly marked.
+        '''
+        cells = self.cells
+        to_mark = []
+
+        for line in flat_lines(self.cols, self.rows):
+            run_start = 0
+            run_color = cells[line[0]] & COLOR_MASK
+            for position in range(1, len(line) + 1):
+                color = cells[line[position]] & COLOR_MASK if position < len(line) else EMPTY
+                if color != run_color:
+                    if run_color != EMPTY and position - run_start >= 3:
+                        to_mark.extend(line[run_start:position])
+                    run_start = position
+                    run_color = color
+
+        marked = 0
+        for i in to_mark:
+            if cells[i] >> STATE_SHIFT != MATCHED:
+                cells[i] = (MATCHED << STATE_SHIFT) | (cells[i] & COLOR_MASK)
+                marked += 1
+        return marked
+    def check_for_matches(self) -> bool:
+        '''If there is a matched square, returns True. Otherwise, returns False'''
+        return any(code >> STATE_SHIFT == MATCHED for code in self.cells)
+    def delete_matches(self):
+        '''Deletes all the matched squares, letting the squares above them fall into their place'''
+        self._compact(lambda code: code >> STATE_SHIFT != MATCHED)
+    def drop_everything(self):
+        '''Deletes all empty squares that are underneath squares with colors in them'''
+        self._compact(lambda code: code != EMPTY)
+    def _compact(self, keep):
+        '''Rebuilds each column with only the squares to keep, pushed to the bottom'''
+        cells = self.cells
+        rows = self.rows
+        for start in range(0, len(cells), rows):
+            column = cells[start:start + rows]
+            kept = bytes(code for code in column if keep(code))
+            if len(kept) != rows:
+                cells[start:start + rows] = bytes(rows - len(kept)) + kept
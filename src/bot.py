@@ -0,0 +1,224 @@
+from board import Board, encode_square, color_code, COLOR_MASK, EMPTY
+from field_class import Field
+from zobrist import ZobristKeys, TranspositionTable
+from simulate import LEFT, RIGHT, ROTATE
+from collections import namedtuple
+import random
+import time
+
+BEAM_WIDTH = 8 # how many positions are kept after each piece
+LOOKAHEAD = 3 # how many pieces are searched, counting the current one
+TIME_BUDGET = 0.05 # seconds to spend choosing each placement
+LOST = -1e9 # the score of a placement that ends the game
+
+# where to put a faller: the column it lands in and how many times it is rotated first
+Placement = namedtuple('Placement', ['col', 'rotations'])
+
+# a position kept in the beam: its total score, the board, the first placement that led to it, and the hash of the board
+Position = namedtuple('Position', ['score', 'board', 'first', 'hash'])
+
+def column_height(board: Board, col: int) -> int:
+    '''Returns how many squares are stacked in a column'''
+    rows = board.rows
+    return rows - board.cells.count(EMPTY, col * rows, (col + 1) * rows)
+
+def column_heights(board: Board) -> list[int]:
+    '''Returns how many squares are stacked in each column'''
+    return [column_height(board, col) for col in range(board.cols)]
+
+def drop_piece(board: Board, col: int, codes: list[int]) -> bool:
+    '''
+    Stacks the square codes of a faller, bottom square first, on top of a column.
+    Returns False, leaving the board alone, if they don't all fit.
+    '''
+    rows = board.rows
+    top = rows - column_height(board, col)
+    if top < len(codes):
+        return False
+    for i, code in enumerate(codes):
+        board.cells[col * rows + top - 1 - i] = code
+    return True
+
+def resolve(board: Board) -> tuple[int, int]:
+    '''Matches and deletes squares until nothing matches, returning the number of squares cleared and the length of the chain'''
+    cleared = 0
+    chain = 0
+    while True:
+        matched = board.match_squares()
+        if matched == 0:
+            return cleared, chain
+        cleared += matched
+        chain += 1
+        board.delete_matches()
+
+def rotations(codes: list[int]) -> list[list[int]]:
+    '''Returns the squares of a faller, bottom square first, after 0, 1 and 2 rotations'''
+    return [codes[turns:] + codes[:turns] for turns in range(len(codes))]
+
+# heuristics score a board after a piece has been placed and resolved; higher is better
+def cleared_score(board: Board, cleared: int, chain: int) -> float:
+    '''Clearing squares is good, and clearing them in a chain is better'''
+    return cleared * chain
+
+def height_score(board: Board, cleared: int, chain: int) -> float:
+    '''Tall stacks are close to losing, and the tallest one most of all'''
+    heights = column_heights(board)
+    return -sum(height * height for height in heights) / board.rows - 4 * max(heights)
+
+def bumpiness_score(board: Board, cleared: int, chain: int) -> float:
+    '''Columns of very different heights are hard to fill without burying colors'''
+    heights = column_heights(board)
+    return -sum(abs(heights[col] - heights[col + 1]) for col in range(len(heights) - 1))
+
+def pairs_score(board: Board, cleared: int, chain: int) -> float:
+    '''Squares next to a square of the same color are one square away from a match'''
+    cells = board.cells
+    rows = board.rows
+    pairs = 0
+    for col in range(board.cols):
+        for row in range(rows):
+            color = cells[col * rows + row] & COLOR_MASK
+            if color == EMPTY:
+                continue
+            for coldelta, rowdelta in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                next_col = col + coldelta
+                next_row = row + rowdelta
+                if next_col < board.cols and 0 <= next_row < rows and cells[next_col * rows + next_row] & COLOR_MASK == color:
+                    pairs += 1
+    return pairs
+
+DEFAULT_HEURISTICS = ((10.0, cleared_score), (1.0, height_score), (0.5, bumpiness_score), (1.0, pairs_score))
+
+class Bot:
+    '''
+    Chooses where to put each faller with a beam search: every placement of the current faller is tried,
+    the best few resulting boards are kept, and every placement of the next faller is tried on each of them,
+    and so on for a few pieces, until the time budget runs out.
+    Each board is worked out straight from the frozen squares without passing time in a Field.
+    '''
+    def __init__(self, heuristics = DEFAULT_HEURISTICS, beam_width: int = BEAM_WIDTH, lookahead: int = LOOKAHEAD,
+            time_budget: float = TIME_BUDGET) -> None:
+        '''Initializes variables. heuristics is a sequence of (weight, heuristic(board, cleared, chain)).'''
+        self.heuristics = heuristics
+        self.beam_width = beam_width
+        self.lookahead = lookahead
+        self.time_budget = time_budget
+        self.keys = ZobristKeys()
+        self.scores = TranspositionTable() # the scores of boards already evaluated, by their hash and what the placement cleared
+        self.planned_faller = None # the faller that target_col and rotations_left are for
+        self.target_col = None
+        self.rotations_left = 0
+    def evaluate(self, board: Board, cleared: int, chain: int, key: int = None, depth: int = 0) -> float:
+        '''
+        Returns the weighted sum of the heuristics for a board, given its hash if it is already known.
+        depth is how many pieces into the search the board is, so that the table keeps the deeper boards when two collide.
+        '''
+        if key is None:
+            key = self.keys.hash_board(board)
+        key ^= self.keys.result(cleared, chain)
+        score = self.scores.get(key)
+        if score is None:
+            score = sum(weight * heuristic(board, cleared, chain) for weight, heuristic in self.heuristics)
+            self.scores.store(key, depth, score)
+        return score
+    def _expand(self, position: Position, codes: list[int], cols, depth: int) -> list[Position]:
+        '''Returns the positions after every placement of a faller in the given columns of a position's board'''
+        expanded = []
+        keys = self.keys
+        rows = position.board.rows
+        for turns, rotated in enumerate(rotations(codes)):
+            for col in cols:
+                board = position.board.copy()
+                first = position.first or Placement(col, turns)
+                top = rows - column_height(board, col)
+                if not drop_piece(board, col, rotated):
+                    expanded.append(Position(position.score + LOST, board, first, position.hash))
+                    continue
+
+                # only the squares of the faller are new, unless the placement clears squares
+                key = position.hash
+                for i, code in enumerate(rotated):
+                    key ^= keys.code(col, top - 1 - i, code)
+                before = bytes(board.cells)
+                cleared, chain = resolve(board)
+                if cleared:
+                    for i, (old, new) in enumerate(zip(before, board.cells)):
+                        if old != new:
+                            key ^= keys.code(i // rows, i % rows, old) ^ keys.code(i // rows, i % rows, new)
+
+                score = position.score + self.evaluate(board, cleared, chain, key, depth)
+                expanded.append(Position(score, board, first, key))
+        return expanded
+    def choose(self, field: Field) -> Placement:
+        '''Returns where the current faller of a field should go, within the time budget'''
+        deadline = time.perf_counter() + self.time_budget
+        self.scores.new_search()
+        faller = field.faller
+        board = Board.from_field(field.field_wo_faller)
+        codes = [encode_square(f' {square[1]} ') for square in faller.faller]
+        upcoming = [
+            [color_code(color) for color in reversed(colors.split())]
+            for colors in field.upcoming_fallers(self.lookahead - 1)
+        ]
+
+        beam = [Position(0.0, board, None, self.keys.hash_board(board))]
+        pieces = [(codes, reachable_columns(field))] + [(piece, range(field.cols)) for piece in upcoming]
+        for depth, (piece, cols) in enumerate(pieces):
+            expanded = []
+            for position in beam:
+                if depth > 0 and time.perf_counter() > deadline:
+                    # a piece that was only partly searched can't be compared, so the last full piece is used
+                    return beam[0].first
+                expanded.extend(self._expand(position, piece, cols, depth))
+
+            # positions with the same board are the same from here on, so only the best one of them is kept
+            best = {}
+            for position in expanded:
+                if position.hash not in best or position.score > best[position.hash].score:
+                    best[position.hash] = position
+            beam = sorted(best.values(), key = lambda position: position.score, reverse = True)[:self.beam_width]
+
+        return beam[0].first
+    def next_action(self, field: Field):
+        '''
+        Returns the next thing to do to the faller on the way to its chosen placement (LEFT, RIGHT or ROTATE),
+        or None once it is there. The placement is chosen the first time a new faller is seen.
+        '''
+        faller = field.faller
+        if field.need_new_faller or faller == [] or faller.frozen:
+            return None
+
+        if faller is not self.planned_faller:
+            self.planned_faller = faller
+            placement = self.choose(field)
+            self.target_col = placement.col
+            self.rotations_left = placement.rotations
+
+        if self.rotations_left > 0:
+            self.rotations_left -= 1
+            return ROTATE
+        if faller.faller_col < self.target_col:
+            return RIGHT
+        if faller.faller_col > self.target_col:
+            return LEFT
+        return None
+    def policy(self, field: Field, rand: random.Random):
+        '''A policy for simulate.play_game that plays like the bot'''
+        return self.next_action(field)
+
+def reachable_columns(field: Field) -> list[int]:
+    '''Returns the columns the current faller can still be moved to without being blocked by frozen squares'''
+    faller = field.faller
+    rows = range(faller.faller_spot - faller.faller_num, faller.faller_spot)
+
+    def blocked(col: int) -> bool:
+        column = field.field_wo_faller[col]
+        return any(column[row][1] != ' ' and column[row][0] == ' ' for row in rows if 0 <= row < len(column))
+
+    reachable = [faller.faller_col]
+    for step in (-1, 1):
+        col = faller.faller_col + step
+        while 0 <= col < field.cols and not blocked(col):
+            reachable.append(col)
+            col += step
+    return sorted(reachable)
@@ -1,6 +1,7 @@
 from faller_class import Faller
+import line_index
 import random
-from collections import namedtuple
+from collections import Counter, deque, namedtuple
 
 class InvalidColumnError(Exception):
     '''Raised whenever the user tries to drop a faller into a column number that does not exist'''
@@ -13,19 +14,49 @@ class GameOverError(Exception):
 
 COLORS = ('R', 'O', 'Y', 'G', 'B', 'I', 'P')
 
-Match = namedtuple('Match', ['delta', 'num'])
+UPCOMING_FALLERS = 8 # how many fallers are generated at a time
+
+# the whole state of a field, as returned by Field.snapshot. squares holds one byte per square (see board.py);
+# changed_columns holds (col, squares) for the columns of field_wo_faller that are different from the field;
+# faller is None or (its squares, col, spot, num, landed, frozen); flags are need_new_faller, matching,
+# game_over and whether the field is fully matched
+Snapshot = namedtuple('Snapshot', ['squares', 'changed_columns', 'faller', 'flags', 'upcoming', 'hash'])
+
+# what Field.resolve_cascades did: how many times matches were deleted, how many squares each time,
+# and how many squares of each color letter in all
+Cascade = namedtuple('Cascade', ['chain', 'cleared', 'colors'])
+
 
 class Field:
-    def __init__(self, field: list[list[str]]) -> None:
-        '''Initializes variables'''
-        self.cols = 6
-        self.rows = 13
+    def __init__(self, field: list[list[str]], engine = None, rand: random.Random = None, piece_generator = None, zobrist = None) -> None:
+        '''
+        Initializes variables.
+        An engine is a board class such as board.Board or bitboard.BitBoard that the field
+        is copied into to find, delete and drop the matches.
+        The random.Random instance rand is used for the colors and columns of the fallers 
+        (the random module itself is used if it is not given), and piece_generator(rand) 
+        can be given to choose the colors of each faller instead, returned as a string such as 'R G B'.
+        The colors come from their own random.Random seeded from rand, so looking at the upcoming fallers
+        doesn't change which columns the fallers are put in.
+        If zobrist.ZobristKeys are given, the hash of the field is kept up to date as it changes.
+        '''
+        self.engine = engine
+        self.rand = rand if rand is not None else random
+        self.color_rand = random.Random(self.rand.getrandbits(64)) # the colors of the fallers, apart from their columns
+        self.piece_generator = piece_generator
+        self.upcoming = deque() # the colors of the next fallers
+        self.cols = len(field)
+        self.rows = len(field[0]) if field else 0
         self.field = field
         self.field_wo_faller = self._copy_field(field)
         self.faller = []
         self.need_new_faller = True
         self.matching = True
         self.game_over = False
+        self._fully_matched = False # True once every match in the field has been marked
+        self.zobrist = zobrist
+        self.hash = zobrist.hash_field(self) if zobrist is not None else 0
+        self._squares_above_faller = False # True if the faller has squares above it, which move down with it
     def _copy_field(self, field: list[list[str]]) -> list[list[str]]:
         '''Makes a copy of the current field'''
         field_copy = []
@@ -40,65 +71,120 @@ class Field:
     def _update_field(self, new_col: int):
         '''
         Updates the field when the faller changes (in position or in state) if the change is possible. 
+        Only the squares the faller leaves and the squares it moves into are changed.
         Raises an InvalidMoveError if the move is invalid.
         '''
         faller = self.faller
-        field = self._copy_field(self.field_wo_faller)
-        col = field[new_col]
+        old_col = self.field[faller.faller_col]
+        col = self.field[new_col]
+        col_wo_faller = self.field_wo_faller[new_col]
         spot = faller.faller_spot - 1 # faller should remain in the same level
 
         for i in range(faller.faller_num):
-            new_square = col[spot - i]
-            if new_square[1] in COLORS and new_square[0] == ' ': # check if the there are any frozen blocks in this square
+            new_square = col_wo_faller[spot - i]
+            if new_square[1] != ' ' and new_square[0] == ' ': # check if the there are any frozen blocks in this square
                 raise InvalidMoveError
         
+        hashing = self.zobrist is not None
+        if hashing:
+            old_col_num = faller.faller_col
+            first_row = spot - faller.faller_num + 1
+            self._toggle_faller()
+            self._toggle_squares(old_col_num, first_row, spot + 1)
+            self._toggle_squares(new_col, first_row, spot + 1)
+
         self._change_faller_state(new_col)
 
-        if faller.faller_spot < len(col) and col[faller.faller_spot] == '   ':
+        if faller.faller_spot < len(col_wo_faller) and col_wo_faller[faller.faller_spot] == '   ':
             faller.fall()
 
+        # put back what was underneath the faller, then draw the faller in its new column
+        old_col_wo_faller = self.field_wo_faller[faller.faller_col]
+        for i in range(faller.faller_num):
+            old_col[spot - i] = old_col_wo_faller[spot - i]
         for i in range(faller.faller_num):
             col[spot - i] = faller.faller[i] 
 
         faller.change_faller_col(new_col)
-        self.field = field
-    def _generate_rand_colors(self):
-        '''Generates 3 random colors to create a faller'''
-        rand_nums = []
-        for num in range(3):
-            rand_num = random.randint(0, len(COLORS) - 1)
-            rand_nums.append(rand_num)
-        
-        colors_str = f'{COLORS[rand_nums[0]]} {COLORS[rand_nums[1]]} {COLORS[rand_nums[2]]}'
-        return colors_str 
-    def create_faller(self):
-        '''Creates a faller object only if the previous faller object has already been frozen'''
-        colors = self._generate_rand_colors()
-        col_num = random.randint(0, self.cols - 1)
-
-        # do not drop a faller in a column that is already filled
-        while '   ' not in self.field[col_num]:
-            col_num = random.randint(0, self.cols - 1)
+        # a column can have squares above the faller's rows, which then move down with it
+        self._squares_above_faller = self._has_squares_above_faller()
 
+        if hashing:
+            self._toggle_squares(old_col_num, first_row, spot + 1)
+            self._toggle_squares(new_col, first_row, spot + 1)
+            self._toggle_faller()
+    def _toggle_squares(self, col: int, start: int, end: int):
+        '''
+        Flips the keys of the squares from row start up to (but not including) end of a column in and out of the hash.
+        Calling it before and after changing those squares takes the old squares out of the hash and puts the new ones in.
+        '''
+        if self.zobrist is None:
+            return
+        column = self.field[col]
+        for row in range(max(start, 0), min(end, len(column))):
+            self.hash ^= self.zobrist.square(col, row, column[row])
+    def _has_squares_above_faller(self) -> bool:
+        '''Returns True if there are any squares above the faller in its column'''
+        faller = self.faller
+        column = self.field[faller.faller_col]
+        return any(square != '   ' for square in column[:max(faller.faller_spot - faller.faller_num, 0)])
+    def _toggle_faller(self):
+        '''Flips the key of the faller in or out of the hash, the same way as _toggle_squares'''
+        if self.zobrist is not None:
+            self.hash ^= self.zobrist.faller(self.faller)
+    def _update_field_wo_faller(self):
+        '''Copies the field into the field without the faller, reusing its lists instead of making a new copy'''
+        for col in range(len(self.field)):
+            self.field_wo_faller[col][:] = self.field[col]
+    def _generate_rand_colors(self):
+        '''Generates the colors of the next few fallers at once and adds them to the upcoming fallers'''
+        if self.piece_generator is not None:
+            for i in range(UPCOMING_FALLERS):
+                self.upcoming.append(self.piece_generator(self.color_rand))
+        else:
+            colors = self.color_rand.choices(COLORS, k = 3 * UPCOMING_FALLERS)
+            for i in range(0, len(colors), 3):
+                self.upcoming.append(f'{colors[i]} {colors[i + 1]} {colors[i + 2]}')
+    def upcoming_fallers(self, num: int) -> list[str]:
+        '''Returns the colors of the next num fallers without using them up'''
+        while len(self.upcoming) < num:
+            self._generate_rand_colors()
+        return [self.upcoming[i] for i in range(num)]
+    def create_faller(self, colors: str = None, col_num: int = None):
+        '''
+        Creates a faller object only if the previous faller object has already been frozen.
+        The colors and column are chosen at random unless they are given.
+        '''
         if self.game_over:
             raise GameOverError
-        else:
-            if self.faller == []: 
-                # creates the very first faller
-                if self._is_valid_column_number(col_num):
-                    self.faller = Faller(colors, col_num)
-                else:
-                    raise InvalidColumnError
 
-            if self.faller.frozen:
-                if self._is_valid_column_number(col_num):
-                    self.faller = Faller(colors, col_num)
-                else:
-                    raise InvalidColumnError
+        if colors is None:
+            if not self.upcoming:
+                self._generate_rand_colors()
+            colors = self.upcoming.popleft()
+
+        if col_num is None:
+            # do not drop a faller in a column that is already filled
+            open_cols = [col for col in range(self.cols) if '   ' in self.field[col]]
+            if open_cols == []:
+                self.game_over = True
+                raise GameOverError
+            col_num = self.rand.choice(open_cols)
+
+        self._toggle_faller()
+        if self.faller == [] or self.faller.frozen: 
+            # creates the very first faller or the one after the last one froze
+            if self._is_valid_column_number(col_num):
+                self.faller = Faller(colors, col_num)
+            else:
+                self._toggle_faller()
+                raise InvalidColumnError
 
         self.faller.change_faller_col(col_num)
+        self._toggle_faller()
         self.need_new_faller = False
         self.matching = False
+        self._squares_above_faller = self._has_squares_above_faller()
     def _change_faller_state(self, new_col: int):
         '''
         Depending on the previous state of the faller and the next square the faller is going to fall into,
@@ -124,6 +210,10 @@ class Field:
                 column[faller.faller_spot - i] = faller.faller[i]
     def _faller_drop(self, faller: Faller, column: list):
         '''Has the faller drop down a level if there is an empty space underneath it'''
+        # only the squares from the top of the faller to the square underneath it change,
+        # unless it is all the way in and there are squares above it, which move down with it
+        start = 0 if faller.faller_num == 3 and self._squares_above_faller else faller.faller_spot - 3
+        self._toggle_squares(faller.faller_col, start, faller.faller_spot + 1)
         if faller.faller_num < 3:
             for num in range(faller.faller_num + 1):
                 column[faller.faller_spot - num] = faller.faller[num]
@@ -133,6 +223,7 @@ class Field:
             column.pop(faller.faller_spot)
             column.insert(0, '   ')
 
+        self._toggle_squares(faller.faller_col, start, faller.faller_spot + 1)
         faller.add_to_faller_spot()
     def _faller_freeze(self, faller: Faller):
         '''
@@ -141,7 +232,9 @@ class Field:
         If the faller does not fit in the field, the game ends.
         '''
         faller.faller_spot -= 1
+        self._toggle_squares(faller.faller_col, faller.faller_spot - 2, faller.faller_spot + 1)
         self._change_faller_state_in_field()
+        self._toggle_squares(faller.faller_col, faller.faller_spot - 2, faller.faller_spot + 1)
         if faller.faller_num < 3:
             if self._check_game_over_matches():
                 if self._check_if_faller_outside_field():
@@ -151,30 +244,84 @@ class Field:
                     self._delete_extra_rows()
             else:
                 self.game_over = True
+            # the game over checks put back older copies of the field
+            self._fully_matched = False
+            if self.zobrist is not None:
+                self.hash = self.zobrist.hash_field(self)
         else:
-            self.match_squares()
+            # only the lines through the faller can have new matches
+            faller_squares = {(faller.faller_col, faller.faller_spot - i) for i in range(faller.faller_num)}
+            if self._squares_above_faller:
+                # the squares that were above the faller moved down with it, so their lines changed too
+                faller_squares.update((faller.faller_col, row) for row in range(faller.faller_spot + 1))
+            self.match_squares(faller_squares)
             if self.check_for_matches():
                 self.matching = True
         faller.faller_num += 1 # get value to what it originally was
-        self.field_wo_faller = self._copy_field(self.field) # update the field without the faller
+        self._update_field_wo_faller() # the frozen faller is now part of the field
         self.need_new_faller = True
     def _faller_land(self, faller: Faller, column: list):
         '''Has the faller go into its landing state'''
         if faller.faller_num < 3:
             faller.add_to_faller_num()
-                
+
+        self._toggle_squares(faller.faller_col, faller.faller_spot - 3, faller.faller_spot + 1)
         if faller.faller_spot - 3 >= 0: # checks if the faller is at the very top of the column
             column[faller.faller_spot - 3] = '   '
 
         self._change_faller_state_in_field()
+        self._toggle_squares(faller.faller_col, faller.faller_spot - 3, faller.faller_spot + 1)
         faller.add_to_faller_spot()
     def _match(self):
         '''Checks it there are matches, and if there are, eliminates the squares in the matches'''
         if self.check_for_matches():
-            self.delete_matches()
+            changed = self.delete_matches()
+            self.match_squares(changed)
+            self._update_field_wo_faller()
         else:
             self.matching = False
-        self.match_squares()
+    def _count_matched_squares(self) -> int:
+        '''Returns the number of squares that are marked as matched'''
+        return sum(square[0] == '*' for column in self.field for square in column)
+    def _count_colors(self) -> Counter:
+        '''Returns how many squares of each color are in the field'''
+        return Counter(square[1] for column in self.field for square in column if square != '   ')
+    def resolve_cascades(self) -> Cascade:
+        '''
+        Deletes the matches and lets the squares above them fall, over and over until nothing matches,
+        in one call instead of one pass_time for each step of the chain.
+        Does nothing while there is a faller in the field, the same way pass_time only matches between fallers.
+        With an engine, the field is copied into one board for the whole chain and copied back at the end.
+        '''
+        if self.game_over:
+            raise GameOverError
+        if not self.need_new_faller:
+            return Cascade(0, [], {})
+
+        if not self._fully_matched:
+            self.match_squares()
+        colors = self._count_colors()
+        cleared = []
+        matched = self._count_matched_squares()
+
+        board = self._engine_board() if matched else None
+        if board is not None:
+            while matched:
+                cleared.append(matched)
+                board.delete_matches()
+                matched = board.match_squares() # nothing is marked after deleting, so every mark is new
+            self._load_board(board)
+        else:
+            while matched:
+                cleared.append(matched)
+                self.match_squares(self.delete_matches())
+                matched = self._count_matched_squares()
+
+        # squares are only ever deleted, so the colors that are gone are the ones that were cleared
+        colors.subtract(self._count_colors())
+        self.matching = False
+        self._update_field_wo_faller()
+        return Cascade(len(cleared), cleared, {color: count for color, count in colors.items() if count})
     def pass_time(self):
         '''Shifts the faller down a square and updates the state (still dropping, landed, or frozen) of the faller'''
         if self.game_over:
@@ -183,6 +330,7 @@ class Field:
             if not self.need_new_faller:
                 faller = self.faller
                 column = self.field[faller.faller_col]
+                self._toggle_faller()
                 self._change_faller_state(faller.faller_col)
                 if not self.matching: # if the field is not matching squares, then do things with the faller
                     if not faller.landed and not faller.frozen:
@@ -191,6 +339,7 @@ class Field:
                         self._faller_freeze(faller)
                     elif faller.landed:
                         self._faller_land(faller, column)
+                self._toggle_faller()
             else:
                 self._match()
     def rotate_faller(self):
@@ -200,11 +349,16 @@ class Field:
         else:
             if not self.need_new_faller:
                 faller = self.faller
-                faller.rotate()
                 spot = faller.faller_spot - 1 # faller should remain in the same level
+                first_row = spot - faller.faller_num + 1
+                self._toggle_faller()
+                self._toggle_squares(faller.faller_col, first_row, spot + 1)
+                faller.rotate()
                 col = self.field[faller.faller_col]
                 for i in range(faller.faller_num):
                     col[spot - i] = faller.faller[i] 
+                self._toggle_squares(faller.faller_col, first_row, spot + 1)
+                self._toggle_faller()
     def move_faller_left(self):
         '''
         Moves the faller one column to the left, if there is one 
@@ -239,56 +393,87 @@ class Field:
     def _is_valid_row_number(self, row_num: int) -> bool:
         '''Returns True if the given row number is valid; returns False otherwise'''
         return 0 <= row_num < self.rows
-    def _three_in_a_row(self, col: int, row: int, coldelta: int, rowdelta: int):
-        '''Returns the number of the same colors in a certain direction that are in a row'''
-        start_square = self.field[col][row][1]
-        num = 0
-        if start_square == ' ':
-            return num
-        else:
-            for i in range(max([self.cols, self.rows])):
-                if self._is_valid_column_number(col + coldelta * i) and self._is_valid_row_number(row + rowdelta * i):
-                    if start_square == self.field[col + coldelta * i][row + rowdelta * i][1]:
-                        num += 1
-                    else:
-                        return num        
-                else:
-                    return num
-            return num
-    def _match_sequence_begins_at(self, col: int, row: int):
+    def _mark_run(self, line: tuple, start: int, end: int):
+        '''Puts stars around the colors of the squares from start up to (but not including) end in a line'''
+        zobrist = self.zobrist
+        for col, row in line[start:end]:
+            square = self.field[col][row]
+            matched = f'*{square[1]}*'
+            if zobrist is not None:
+                self.hash ^= zobrist.square(col, row, square) ^ zobrist.square(col, row, matched)
+            self.field[col][row] = matched
+    def _match_line(self, line: tuple):
+        '''Marks every run of 3 or more of the same color in a line'''
+        field = self.field
+        run_start = 0
+        run_color = field[line[0][0]][line[0][1]][1]
+        for position in range(1, len(line)):
+            col, row = line[position]
+            color = field[col][row][1]
+            if color != run_color:
+                if run_color != ' ' and position - run_start >= 3:
+                    self._mark_run(line, run_start, position)
+                run_start = position
+                run_color = color
+
+        if run_color != ' ' and len(line) - run_start >= 3:
+            self._mark_run(line, run_start, len(line))
+    def _match_lines_through(self, col: int, row: int):
+        '''Marks the runs of 3 or more of the same color that go through the given square'''
+        field = self.field
+        color = field[col][row][1]
+        if color == ' ':
+            return
+
+        for line, position in line_index.lines_through(self.cols, self.rows).get((col, row), ()):
+            start = position
+            while start > 0 and field[line[start - 1][0]][line[start - 1][1]][1] == color:
+                start -= 1
+            end = position + 1
+            while end < len(line) and field[line[end][0]][line[end][1]][1] == color:
+                end += 1
+            if end - start >= 3:
+                self._mark_run(line, start, end)
+    def match_squares(self, changed: set[tuple[int, int]] = None):
         '''
-        Returns a list of objects containing details about a match that has 3 or more colors in a row
-        (direction of the match and the number of colors in the match)
+        If there is a match in the field, indicates that by putting stars around the colors that are in the match.
+        If the squares that changed since the last time the field was matched are given, 
+        only the lines going through those squares are checked.
         '''
-        matches = []
-        if self._three_in_a_row(col, row, 0, 1) >= 3:
-            matches.append(Match((0, 1), self._three_in_a_row(col, row, 0, 1)))
-        if self._three_in_a_row(col, row, 1, 1) >= 3:
-            matches.append(Match((1, 1), self._three_in_a_row(col, row, 1, 1)))
-        if self._three_in_a_row(col, row, 1, 0) >= 3:
-            matches.append(Match((1, 0), self._three_in_a_row(col, row, 1, 0)))
-        if self._three_in_a_row(col, row, 1, -1) >= 3:
-            matches.append(Match((1, -1), self._three_in_a_row(col, row, 1, -1)))
-        if self._three_in_a_row(col, row, 0, -1) >= 3:
-            matches.append(Match((0, -1), self._three_in_a_row(col, row, 0, -1)))
-        if self._three_in_a_row(col, row, -1, -1) >= 3:
-            matches.append(Match((-1, -1), self._three_in_a_row(col, row, -1, -1)))
-        if self._three_in_a_row(col, row, -1, 0) >= 3:
-            matches.append(Match((-1, 0), self._three_in_a_row(col, row, -1, 0)))
-        if self._three_in_a_row(col, row, -1, 1) >= 3:
-            matches.append(Match((-1, 1), self._three_in_a_row(col, row, -1, 1)))
-        
-        return matches
-    def match_squares(self):
-        '''If there is a match in the field, indicates that by putting stars around the colors that are in the match'''
-        for col in range(len(self.field)):
-            for row in range(len(self.field[col])):
-                matches = self._match_sequence_begins_at(col, row)
-                for match in matches:
-                    coldelta = match.delta[0]
-                    rowdelta = match.delta[1]
-                    for i in range(match.num):
-                        self.field[col + coldelta * i][row + rowdelta * i] = f'*{self.field[col][row][1]}*'
+        if not self._fully_matched:
+            changed = None
+        self._fully_matched = True
+
+        board = self._engine_board()
+        if board is not None:
+            board.match_squares()
+            self._load_board(board)
+            return
+
+        if changed is not None:
+            for col, row in changed:
+                self._match_lines_through(col, row)
+        else:
+            for line in line_index.lines(self.cols, self.rows):
+                self._match_line(line)
+    def _engine_board(self):
+        '''Returns the field copied into a board of the engine, or None if there is no engine to use'''
+        # while checking if the game is over, the columns are longer than the field and only the string matcher is used
+        if self.engine is None or any(len(column) != self.rows for column in self.field):
+            return None
+        return self.engine.from_field(self.field)
+    def _load_board(self, board) -> set[tuple[int, int]]:
+        '''Copies the squares of an engine board back into the field and returns the squares that changed'''
+        changed = set()
+        for col, board_column in enumerate(board.field):
+            column = self.field[col]
+            for row in range(len(column)):
+                if column[row] != board_column[row]:
+                    changed.add((col, row))
+                    if self.zobrist is not None:
+                        self.hash ^= self.zobrist.square(col, row, column[row]) ^ self.zobrist.square(col, row, board_column[row])
+            column[:] = board_column
+        return changed
     def check_for_matches(self):
         '''If there is a match (a square with a * in it), returns True. Otherwise, returns False'''
         for col in range(len(self.field)):
@@ -296,13 +481,18 @@ class Field:
                 if self.field[col][row][0] == '*':
                     return True
         return False
-    def delete_matches(self):
-        '''Deletes all the matches in the field'''
+    def delete_matches(self) -> set[tuple[int, int]]:
+        '''Deletes all the matches in the field and returns the squares that changed'''
+        board = self._engine_board()
+        if board is not None:
+            board.delete_matches()
+            return self._load_board(board)
+
+        changed = set()
         for col in range(len(self.field)):
-            for row in range(len(self.field[col])):
-                if self.field[col][row][0] == '*':
-                    self.field[col].pop(row)
-                    self.field[col].insert(0, '   ')
+            for row in self._compact_column(col, 0, lambda square: square[0] != '*'):
+                changed.add((col, row))
+        return changed
     def _check_game_over_matches(self):
         '''Check if the faller that has not completely entered the board can match '''
         field = self._copy_field(self.field)
@@ -356,17 +546,90 @@ class Field:
         '''
         column = self.field[col]
         for square in range(len(column)):
-            if column[square][0] == ' ' and column[square][1] in COLORS:
+            if column[square][0] == ' ' and column[square][1] != ' ':
                 return square
         return -1
-    def drop_everything(self):
-        '''Deletes all empty squares that are underneath squares with colors in them'''
+    def _compact_column(self, col: int, start: int, keep) -> list[int]:
+        '''
+        Rebuilds a column in one pass so that the squares from start down that keep(square) is False for are removed, 
+        and everything above them falls down to fill the gaps. Returns the rows whose squares changed.
+        '''
+        column = self.field[col]
+        kept = column[:start]
+        for row in range(start, len(column)):
+            if keep(column[row]):
+                kept.append(column[row])
+
+        removed = len(column) - len(kept)
+        if removed == 0:
+            return []
+
+        new_column = ['   '] * removed + kept
+        changed = [row for row in range(len(column)) if column[row] != new_column[row]]
+        if self.zobrist is not None:
+            for row in changed:
+                self.hash ^= self.zobrist.square(col, row, column[row]) ^ self.zobrist.square(col, row, new_column[row])
+        column[:] = new_column
+        return changed
+    def drop_everything(self) -> set[tuple[int, int]]:
+        '''Deletes all empty squares that are underneath squares with colors in them and returns the squares that changed'''
+        board = self._engine_board()
+        if board is not None:
+            board.drop_everything()
+            return self._load_board(board)
+
+        changed = set()
         for col in range(len(self.field)):
-            column = self.field[col]
-            if self._find_bottom_square_index(col) != -1:
-                for row in range(self._find_bottom_square_index(col), len(column)):
-                    if column[row] == '   ':
-                        column.pop(row)
-                        column.insert(0, '   ')
-                     
+            bottom = self._find_bottom_square_index(col)
+            if bottom != -1:
+                for row in self._compact_column(col, bottom, lambda square: square != '   '):
+                    changed.add((col, row))
+        return changed
+    def snapshot(self) -> Snapshot:
+        '''
+        Returns the state of the field, which restore can put back later.
+        The squares are packed into bytes, so a snapshot is small and doesn't share anything with the field.
+        The upcoming fallers are kept, but not the state of rand or color_rand.
+        '''
+        from board import Board # board imports COLORS from this module
+
+        squares = bytes(Board.from_field(self.field).cells)
+        changed_columns = tuple(
+            (col, bytes(Board.from_field([column]).cells))
+            for col, column in enumerate(self.field_wo_faller) if column != self.field[col]
+        )
+        faller = self.faller
+        if faller != []:
+            faller = (bytes(Board.from_field([faller.faller]).cells), faller.faller_col, faller.faller_spot,
+                faller.faller_num, faller.landed, faller.frozen)
+        else:
+            faller = None
+        flags = (self.need_new_faller, self.matching, self.game_over, self._fully_matched)
+        return Snapshot(squares, changed_columns, faller, flags, tuple(self.upcoming), self.hash)
+    def restore(self, snapshot: Snapshot):
+        '''Puts the field back to the state it was in when the snapshot was taken'''
+        from board import decode_square
+
+        rows = self.rows
+        squares = snapshot.squares
+        self.field = [[decode_square(code) for code in squares[col * rows:(col + 1) * rows]] for col in range(self.cols)]
+        self.field_wo_faller = self._copy_field(self.field)
+        for col, column in snapshot.changed_columns:
+            self.field_wo_faller[col] = [decode_square(code) for code in column]
+
+        if snapshot.faller is None:
+            self.faller = []
+        else:
+            faller_squares, col, spot, num, landed, frozen = snapshot.faller
+            faller = Faller('', col)
+            faller.faller = [decode_square(code) for code in faller_squares]
+            faller.faller_spot = spot
+            faller.faller_num = num
+            faller.landed = landed
+            faller.frozen = frozen
+            self.faller = faller
 
+        self.need_new_faller, self.matching, self.game_over, self._fully_matched = snapshot.flags
+        self.upcoming = deque(snapshot.upcoming)
+        self.hash = snapshot.hash
+        self._squares_above_faller = self.faller != [] and self._has_squares_above_faller()
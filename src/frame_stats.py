@@ -0,0 +1,81 @@
+import time
+import csv
+
+FRAMES_KEPT = 600 # about 10 seconds of frames at 60 frames per second
+PHASES = ('events', 'tick', 'draw', 'flip')
+PERCENTILES = (50, 95, 99)
+
+class FrameStats:
+    '''
+    Measures how long each phase of the last few frames took, keeping the times in a ring buffer
+    so that measuring a frame never allocates anything
+    '''
+    def __init__(self, size: int = FRAMES_KEPT, clock = time.perf_counter) -> None:
+        '''Initializes variables'''
+        self.size = size
+        self.clock = clock
+        # the seconds spent in each phase and in the whole frame, by frame, oldest frame overwritten first
+        self.times = {phase: [0.0] * size for phase in PHASES + ('frame',)}
+        self.next_frame = 0 # where the next frame is stored in the ring buffer
+        self.count = 0 # how many frames are stored, at most size
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last_mark = None
+        self.last_frame_end = None
+    def start_frame(self):
+        '''Starts measuring a new frame'''
+        for phase in PHASES:
+            self.current[phase] = 0.0
+        self.last_mark = self.clock()
+        if self.last_frame_end is None:
+            self.last_frame_end = self.last_mark
+    def mark(self, phase: str):
+        '''Adds the time since the last mark (or the start of the frame) to a phase of the current frame'''
+        now = self.clock()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+    def end_frame(self):
+        '''
+        Stores the times of the current frame.
+        The frame time is the time since the end of the last frame, so it includes any time spent waiting between frames.
+        '''
+        now = self.clock()
+        spot = self.next_frame
+        for phase in PHASES:
+            self.times[phase][spot] = self.current[phase]
+        self.times['frame'][spot] = now - self.last_frame_end
+        self.last_frame_end = now
+
+        self.next_frame = (spot + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+    def _stored(self, phase: str) -> list[float]:
+        '''Returns the stored times of a phase, oldest first'''
+        times = self.times[phase]
+        if self.count < self.size:
+            return times[:self.count]
+        return times[self.next_frame:] + times[:self.next_frame]
+    def percentiles(self, phase: str, percents: tuple[int, ...] = PERCENTILES) -> tuple[float, ...]:
+        '''Returns the given percentiles of the stored times of a phase in milliseconds, using the nearest rank'''
+        times = sorted(self._stored(phase))
+        if not times:
+            return tuple(0.0 for percent in percents)
+        return tuple(1000 * times[max(0, -(-percent * len(times) // 100) - 1)] for percent in percents)
+    def fps(self) -> float:
+        '''Returns how many frames a second were drawn over the stored frames'''
+        total = sum(self._stored('frame'))
+        return self.count / total if total > 0 else 0.0
+    def summary(self) -> list[str]:
+        '''Returns one line of text with the frame rate, and one for each phase with its percentiles'''
+        lines = [f'{self.fps():5.1f} fps']
+        for phase in PHASES + ('frame',):
+            values = ' '.join(f'p{percent} {time:6.2f}' for percent, time in zip(PERCENTILES, self.percentiles(phase)))
+            lines.append(f'{phase:6} {values} ms')
+        return lines
+    def write_csv(self, path: str):
+        '''Writes the stored times in milliseconds to a CSV file, one row per frame, oldest frame first'''
+        columns = PHASES + ('frame',)
+        stored = [self._stored(phase) for phase in columns]
+        with open(path, 'w', newline = '') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(('index',) + tuple(f'{phase}_ms' for phase in columns))
+            for frame, times in enumerate(zip(*stored)):
+                writer.writerow([frame] + [f'{1000 * time:.3f}' for time in times])
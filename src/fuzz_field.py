@@ -0,0 +1,197 @@
+from field_class import Field, COLORS, GameOverError, InvalidMoveError, InvalidColumnError
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+import columns_logic
+import argparse
+import importlib
+import os
+import random
+import sys
+
+COLUMNS = 6
+ROWS = 13
+STEPS = 400 # the most steps in one game
+CHUNK_SIZE = 50 # how many games a worker plays before sending back its results
+
+# what to do to the faller on one step (None just lets time pass)
+MOVES = (None, 'left', 'right', 'rotate')
+
+# one step of a game: the colors and column pick of the faller to create if one is needed, then a move, then a tick.
+# the column pick chooses among the columns that are still open when the faller is created.
+Step = namedtuple('Step', ['colors', 'col_pick', 'move'])
+
+# where the candidate first disagreed with the reference
+Mismatch = namedtuple('Mismatch', ['step', 'action', 'reference', 'candidate'])
+
+# a fixed game that is played every time the fuzzer runs, starting from the given squares
+Regression = namedtuple('Regression', ['name', 'squares', 'steps'])
+
+E = '   '
+REGRESSIONS = [
+    # the second faller moves under the floating Y and pushes it down into the row of Ys on its right.
+    # random games can't leave squares floating with room for a faller under them,
+    # since the game over check that doesn't end the game drops everything that floats
+    Regression(
+        'faller under floating square',
+        [[E] * 7, [' Y '] + [E] * 6, [E, E, ' Y ', ' O ', ' P ', ' O ', ' P '], [E, E, ' Y ', ' P ', ' O ', ' P ', ' O ']],
+        [Step('R G B', 0, None)] * 13 + [Step('R G B', 0, 'right')] + [Step('R G B', 0, None)] * 3,
+    ),
+]
+
+def load_engine(name: str):
+    '''Returns the board engine class named 'module.Class', or None for no engine'''
+    if not name:
+        return None
+    module, _, cls = name.rpartition('.')
+    return getattr(importlib.import_module(module), cls)
+
+def generate_steps(seed: int, length: int = STEPS) -> list[Step]:
+    '''Returns a random game of steps, using few enough colors that there are plenty of matches and cascades'''
+    rand = random.Random(seed)
+    palette = COLORS[:rand.randint(2, len(COLORS))]
+    return [
+        Step(' '.join(rand.choices(palette, k = 3)), rand.randrange(COLUMNS), rand.choice(MOVES))
+        for step in range(length)
+    ]
+
+def _state(field: Field, error) -> tuple:
+    '''Returns everything about a field that the reference and the candidate have to agree on'''
+    return (error, field.need_new_faller, field.matching, field.game_over, [column[:] for column in field.field])
+
+def _do(field: Field, action: str, step: Step):
+    '''Does one action to a field and returns the kind of error it raised, if any'''
+    try:
+        if action == 'create':
+            open_cols = [col for col in range(field.cols) if '   ' in field.field[col]]
+            col_num = open_cols[step.col_pick % len(open_cols)] if open_cols else None
+            field.create_faller(step.colors, col_num)
+        elif action == 'left':
+            field.move_faller_left()
+        elif action == 'right':
+            field.move_faller_right()
+        elif action == 'rotate':
+            field.rotate_faller()
+        else:
+            field.pass_time()
+    except (GameOverError, InvalidMoveError, InvalidColumnError) as error:
+        return type(error).__name__
+    return None
+
+def run_steps(steps: list[Step], engine, rows: int = ROWS, cols: int = COLUMNS, squares: list[list[str]] = None) -> Mismatch:
+    '''
+    Plays the same steps on a reference field and on a field using the candidate engine,
+    comparing them after every action. Returns the first mismatch, or None if they always agreed.
+    The fields start with the given squares, or empty if there are none.
+    '''
+    if squares is None:
+        squares = columns_logic.create_empty_state(rows, cols)
+    reference = Field([column[:] for column in squares])
+    candidate = Field([column[:] for column in squares], engine = engine)
+
+    for number, step in enumerate(steps):
+        actions = ['create'] if reference.need_new_faller and not reference.matching else []
+        actions += [step.move, 'tick'] if step.move is not None else ['tick']
+        for action in actions:
+            reference_state = _state(reference, _do(reference, action, step))
+            candidate_state = _state(candidate, _do(candidate, action, step))
+            if reference_state != candidate_state:
+                return Mismatch(number, action, reference_state, candidate_state)
+            if reference.game_over:
+                return None
+    return None
+
+def shrink(steps: list[Step], engine) -> list[Step]:
+    '''
+    Returns the shortest and simplest steps that still make the candidate disagree with the reference that it can find,
+    by cutting off everything after the mismatch, then removing ever smaller chunks of steps,
+    and then replacing moves with just letting time pass
+    '''
+    def fails(steps: list[Step]) -> bool:
+        return run_steps(steps, engine) is not None
+
+    steps = steps[:run_steps(steps, engine).step + 1]
+
+    chunk = len(steps) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(steps):
+            shorter = steps[:start] + steps[start + chunk:]
+            if shorter and fails(shorter):
+                steps = shorter
+            else:
+                start += chunk
+        chunk //= 2
+
+    for i in range(len(steps)):
+        if steps[i].move is not None:
+            simpler = steps[:i] + [steps[i]._replace(move = None)] + steps[i + 1:]
+            if fails(simpler):
+                steps = simpler
+    return steps
+
+def run_regressions(engine) -> list[tuple[str, Mismatch]]:
+    '''Plays the fixed games in REGRESSIONS and returns the name and mismatch of each game that failed'''
+    failures = []
+    for regression in REGRESSIONS:
+        mismatch = run_steps(regression.steps, engine, squares = regression.squares)
+        if mismatch is not None:
+            failures.append((regression.name, mismatch))
+    return failures
+
+def _fuzz_chunk(engine_name: str, seeds: range, length: int) -> list[tuple[int, Mismatch]]:
+    '''Plays the games of a range of seeds and returns the seed and mismatch of each game that failed'''
+    engine = load_engine(engine_name)
+    failures = []
+    for seed in seeds:
+        mismatch = run_steps(generate_steps(seed, length), engine)
+        if mismatch is not None:
+            failures.append((seed, mismatch))
+    return failures
+
+def fuzz(engine_name: str, n_games: int, seed: int = 0, length: int = STEPS, workers: int = None) -> list[tuple[int, Mismatch]]:
+    '''Plays n_games random games across a pool of worker processes and returns the seed and mismatch of each failure'''
+    chunks = [range(first, min(first + CHUNK_SIZE, seed + n_games)) for first in range(seed, seed + n_games, CHUNK_SIZE)]
+    failures = []
+    with ProcessPoolExecutor(max_workers = workers or os.cpu_count()) as executor:
+        for chunk_failures in executor.map(_fuzz_chunk, [engine_name] * len(chunks), chunks, [length] * len(chunks)):
+            failures.extend(chunk_failures)
+    return failures
+
+def _print_mismatch(mismatch: Mismatch):
+    '''Prints where the candidate first disagreed with the reference'''
+    print(f'first mismatch on step {mismatch.step} ({mismatch.action or "tick"}):')
+    print(f'    reference {mismatch.reference}')
+    print(f'    candidate {mismatch.candidate}')
+
+def main(argv: list[str] = None) -> int:
+    '''Fuzzes a candidate engine from the command line and returns 1 if it ever disagreed with the reference'''
+    parser = argparse.ArgumentParser(description = 'Compares a board engine against the reference Field on random games.')
+    parser.add_argument('engine', help = "board engine to check, such as 'bitboard.BitBoard'")
+    parser.add_argument('--games', type = int, default = 1000)
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the first game')
+    parser.add_argument('--steps', type = int, default = STEPS, help = 'the most steps in one game')
+    parser.add_argument('--workers', type = int, help = 'how many processes to use (one per CPU by default)')
+    args = parser.parse_args(argv)
+
+    regressions = run_regressions(load_engine(args.engine))
+    print(f'{len(REGRESSIONS) - len(regressions)} of {len(REGRESSIONS)} regression games agreed')
+    for name, mismatch in regressions:
+        print(f'regression game {name!r}:')
+        _print_mismatch(mismatch)
+
+    failures = fuzz(args.engine, args.games, args.seed, args.steps, args.workers)
+    print(f'{args.games - len(failures)} of {args.games} games agreed')
+    if not failures:
+        return 1 if regressions else 0
+
+    seed, mismatch = failures[0]
+    steps = shrink(generate_steps(seed, args.steps), load_engine(args.engine))
+    mismatch = run_steps(steps, load_engine(args.engine))
+    print(f'game {seed} shrunk to {len(steps)} steps:')
+    for step in steps:
+        print(f'    {step}')
+    _print_mismatch(mismatch)
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
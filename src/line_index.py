@@ -0,0 +1,45 @@
+from functools import lru_cache
+
+# one direction for each line through a square, as (coldelta, rowdelta)
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+@lru_cache(maxsize = None)
+def lines(cols: int, rows: int) -> tuple[tuple[tuple[int, int], ...], ...]:
+    '''
+    Returns every line of 3 or more squares that goes from one edge of a field with the given size to another,
+    in each of the line directions, as a tuple of (col, row) squares
+    '''
+    found = []
+    for coldelta, rowdelta in LINE_DIRECTIONS:
+        for col in range(cols):
+            for row in range(rows):
+                # a line begins at a square whose previous square is outside the field
+                if 0 <= col - coldelta < cols and 0 <= row - rowdelta < rows:
+                    continue
+
+                line = []
+                next_col = col
+                next_row = row
+                while 0 <= next_col < cols and 0 <= next_row < rows:
+                    line.append((next_col, next_row))
+                    next_col += coldelta
+                    next_row += rowdelta
+
+                if len(line) >= 3:
+                    found.append(tuple(line))
+
+    return tuple(found)
+
+@lru_cache(maxsize = None)
+def lines_through(cols: int, rows: int) -> dict[tuple[int, int], tuple[tuple[tuple[tuple[int, int], ...], int], ...]]:
+    '''Returns, for every square of a field with the given size, each line it is on along with its position in that line'''
+    through = {}
+    for line in lines(cols, rows):
+        for position, square in enumerate(line):
+            through[square] = through.get(square, ()) + ((line, position),)
+    return through
+
+@lru_cache(maxsize = None)
+def flat_lines(cols: int, rows: int) -> tuple[tuple[int, ...], ...]:
+    '''Returns the same lines as lines(), with each square as its index col * rows + row in a flat board'''
+    return tuple(tuple(col * rows + row for col, row in line) for line in lines(cols, rows))
@@ -0,0 +1,71 @@
+from simulate import play_game, game_seed, random_policy, GameStats
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+
+class StatsTotals:
+    '''Adds up the stats of many games as they finish, without keeping the stats of each game'''
+    def __init__(self) -> None:
+        '''Initializes variables'''
+        self.games = 0
+        self.ticks = 0
+        self.pieces = 0
+        self.cleared = 0
+        self.max_cascade = 0
+        self.max_ticks = 0
+    def add(self, stats: GameStats):
+        '''Adds the stats of one game'''
+        self.games += 1
+        self.ticks += stats.ticks
+        self.pieces += stats.pieces
+        self.cleared += stats.cleared
+        self.max_cascade = max(self.max_cascade, stats.max_cascade)
+        self.max_ticks = max(self.max_ticks, stats.ticks)
+    def mean(self, total: int) -> float:
+        '''Returns a total divided by the number of games'''
+        return total / self.games if self.games else 0.0
+    def __repr__(self) -> str:
+        return (f'StatsTotals(games={self.games}, mean_ticks={self.mean(self.ticks):.1f}, '
+                f'mean_pieces={self.mean(self.pieces):.1f}, mean_cleared={self.mean(self.cleared):.1f}, '
+                f'max_cascade={self.max_cascade})')
+
+def _play_chunk(policy, seed: int, first_game: int, last_game: int, max_ticks: int) -> list[GameStats]:
+    '''Plays the games numbered first_game up to (but not including) last_game'''
+    return [play_game(policy, game_seed(seed, game), max_ticks) for game in range(first_game, last_game)]
+
+def run_parallel(n_games: int, policy = random_policy, seed: int = 0, max_ticks: int = 100000, 
+                 workers: int = None, chunk_size: int = 64, on_stats = None) -> StatsTotals:
+    '''
+    Plays n_games games over a pool of worker processes and returns their totals.
+    The games are handed out in chunks of chunk_size and only a few chunks per worker are submitted at a time,
+    so memory use stays the same however many games are played. Every game gets its seed from the master seed
+    and its own number, so the results are the same whatever the number of workers.
+    The policy must be a function defined at the top level of a module so it can be sent to the workers.
+    If on_stats is given, it is called with the stats of every game as the game's chunk finishes.
+    '''
+    workers = workers or os.cpu_count() or 1
+    totals = StatsTotals()
+    chunks = ((start, min(start + chunk_size, n_games)) for start in range(0, n_games, chunk_size))
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        pending = set()
+        for first_game, last_game in chunks:
+            pending.add(executor.submit(_play_chunk, policy, seed, first_game, last_game, max_ticks))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                _add_results(done, totals, on_stats)
+
+        done, pending = wait(pending)
+        _add_results(done, totals, on_stats)
+
+    return totals
+
+def _add_results(done: set, totals: StatsTotals, on_stats):
+    '''Adds the stats of finished chunks to the totals'''
+    for future in done:
+        for stats in future.result():
+            totals.add(stats)
+            if on_stats is not None:
+                on_stats(stats)
+
+if __name__ == '__main__':
+    print(run_parallel(1000))
@@ -1,73 +1,354 @@
 import pygame
-from faller_class import Faller
 from field_class import Field
 import field_class
-import columns_logic
 import math
+from collections import OrderedDict
+from frame_stats import FrameStats
+import replay
+import bot
+import random
 
 COLUMNS = 6
 ROWS = 13
 HEIGHT_MARGIN = 15
 BORDER = 2
+SPRITE_SIZES = 4 # how many square sizes the sprite cache keeps blocks for
+TICKS_PER_SECOND = 1 # how many times a second the faller drops
+MAX_FPS = 60
+MAX_CATCH_UP_TICKS = 5 # the most ticks passed in one frame when frames are late
+OVERLAY_FONT_SIZE = 18
+OVERLAY_COLOR = (255, 255, 255)
 
-def run() -> None:
-    '''Runs the entire Columns game when called'''
+# represent each letter as a different color in rgb
+FILL_COLORS = {
+    'R': (255, 0, 0),
+    'O': (255, 102, 0),
+    'Y': (255, 234, 0),
+    'G': (0, 255, 0),
+    'B': (0, 170, 255),
+    'I': (0, 0, 255),
+    'P': (166, 0, 255)
+}
+
+HIGHLIGHTS = {
+    'R': (255, 122, 122),
+    'O': (255, 143, 69),
+    'Y': (255, 241, 92),
+    'G': (94, 255, 94),
+    'B': (105, 205, 255),
+    'I': (99, 99, 255),
+    'P': (198, 92, 255)
+}
+
+SHADOWS = {
+    'R': (186, 3, 0),
+    'O': (196, 79, 0),
+    'Y': (161, 147, 0),
+    'G': (2, 156, 2),
+    'B': (0, 124, 186),
+    'I': (0, 0, 166),
+    'P': (99, 0, 153)
+}
+
+def run(ticks_per_second: float = TICKS_PER_SECOND, max_fps: int = MAX_FPS, vsync: bool = False, stats_csv: str = None,
+        seed: int = None, replay_path: str = None, autoplay: bool = False) -> None:
+    '''
+    Runs the entire Columns game when called.
+    Time passes in the field ticks_per_second times a second however fast the frames are drawn,
+    and at most max_fps frames are drawn each second (0 for no limit, such as when vsync is on).
+    F3 shows or hides the frame times, which are written to the stats_csv file when the game ends if it is given.
+    The game is recorded, and saved to replay_path when it ends if it is given.
+    If autoplay is True, the bot moves the fallers instead of the player.
+    '''
     pygame.init()
 
-    surface = pygame.display.set_mode((700, 600), pygame.RESIZABLE)
-    field = Field(columns_logic.create_empty_state(ROWS, COLUMNS))
+    if seed is None:
+        seed = random.getrandbits(64)
+    surface = _create_window(vsync)
+    field = replay.new_field(COLUMNS, ROWS, seed)
+    game = replay.Recorder(field, seed) # every call that changes the field goes through the recorder
+    renderer = Renderer(surface)
+    player = bot.Bot() if autoplay else None
+    stats = FrameStats()
+    show_stats = False
 
     running = True
     clock = pygame.time.Clock()
-    timer = 0 # keeps track of when to drop the faller
+    tick_length = 1000 / ticks_per_second # in milliseconds
+    time_to_pass = 0 # milliseconds of game time that have not been passed to the field yet
+    dropping = False # if the player asked for the next tick
 
     while running:
-        clock.tick(100)
+        # sleeps until the next frame is due
+        time_to_pass += clock.tick(max_fps)
+        stats.start_frame()
 
         try:
-            if field.need_new_faller:
-                field.create_faller()
-
-            square_size, top_left_corner = draw_grid(surface)
+            # waits for matching to finish so the matched squares are shown and deleted first
+            if field.need_new_faller and not field.matching:
+                game.create_faller()
+            stats.mark('tick')
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    renderer.resize()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_LEFT:
                         try:
-                            field.move_faller_left()
-                            delete_entire_faller(surface, field, top_left_corner, square_size)
+                            game.move_faller_left()
                         except field_class.InvalidMoveError:
                             pass
                     elif event.key == pygame.K_RIGHT:
                         try:
-                            field.move_faller_right()
-                            delete_entire_faller(surface, field, top_left_corner, square_size)
+                            game.move_faller_right()
                         except field_class.InvalidMoveError:
                             pass
                     elif event.key == pygame.K_DOWN:
-                        timer = 100
+                        time_to_pass = max(time_to_pass, tick_length)
+                        dropping = True
                     elif event.key == pygame.K_SPACE:
-                        field.rotate_faller()
+                        game.rotate_faller()
+                    elif event.key == pygame.K_F3:
+                        show_stats = not show_stats
 
-            draw_faller(surface, field, square_size, top_left_corner)
-
-            # drop the faller after one second
-            if timer == 100:
+            if player is not None:
+                # the bot makes one move a frame, the same way as a key press
+                action = player.next_action(field)
                 try:
-                    field.pass_time()
-                    timer = 0
+                    if action == bot.LEFT:
+                        game.move_faller_left()
+                    elif action == bot.RIGHT:
+                        game.move_faller_right()
+                    elif action == bot.ROTATE:
+                        game.rotate_faller()
                 except field_class.InvalidMoveError:
                     pass
-            else:
-                timer += 1
-            
-            pygame.display.flip()
+            stats.mark('events')
+
+            # catch up on the ticks that are due, but give up on them after a long stall
+            ticks = 0
+            while time_to_pass >= tick_length and ticks < MAX_CATCH_UP_TICKS:
+                try:
+                    game.pass_time(dropping)
+                except field_class.InvalidMoveError:
+                    break
+                finally:
+                    dropping = False
+                time_to_pass -= tick_length
+                ticks += 1
+            if ticks == MAX_CATCH_UP_TICKS:
+                time_to_pass = min(time_to_pass, tick_length)
+            stats.mark('tick')
+
+            renderer.draw(field, stats.summary() if show_stats else None)
+            stats.mark('draw')
+            renderer.update()
+            stats.mark('flip')
+            stats.end_frame()
         except field_class.GameOverError:
             running = False
 
     pygame.quit()
+    if stats_csv is not None:
+        stats.write_csv(stats_csv)
+    if replay_path is not None:
+        with open(replay_path, 'wb') as replay_file:
+            replay_file.write(game.to_bytes())
+
+def watch_replay(replay_path: str, start_tick: int = 0, ticks_per_second: float = 10) -> None:
+    '''
+    Plays back a recorded game in a window at ticks_per_second ticks a second,
+    skipping straight to start_tick without drawing the ticks before it
+    '''
+    with open(replay_path, 'rb') as replay_file:
+        recorded = replay.Replay(replay_file.read())
+
+    pygame.init()
+    surface = pygame.display.set_mode((700, 600), pygame.RESIZABLE)
+    field = replay.new_field(recorded.cols, recorded.rows, recorded.seed)
+    renderer = Renderer(surface)
+    clock = pygame.time.Clock()
+
+    watching = True
+    for ticks in recorded.playback(field):
+        if ticks < start_tick:
+            continue
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                watching = False
+            elif event.type == pygame.VIDEORESIZE:
+                renderer.resize()
+        if not watching:
+            break
+
+        renderer.draw(field)
+        renderer.update()
+        clock.tick(ticks_per_second)
+
+    pygame.quit()
+
+def _create_window(vsync: bool) -> pygame.Surface:
+    '''Opens the game window, synced to the display's refresh rate if vsync is True and the display allows it'''
+    if vsync:
+        try:
+            return pygame.display.set_mode((700, 600), pygame.RESIZABLE | pygame.SCALED, vsync = 1)
+        except pygame.error:
+            pass
+    return pygame.display.set_mode((700, 600), pygame.RESIZABLE)
+
+class Renderer:
+    '''
+    Draws the whole field, only redrawing the squares that changed since the last frame
+    and only sending those squares to the display
+    '''
+    def __init__(self, surface: pygame.Surface) -> None:
+        '''Initializes variables'''
+        self.surface = surface
+        self.resize()
+    def resize(self):
+        '''Redraws the empty grid to fit the current size of the window'''
+        self.grid, self.square_size, self.top_left_corner = _grid_cache.get(self.surface.get_size())
+        self.surface.blit(self.grid, (0, 0))
+        # the square strings drawn last frame, by column; every square is empty on the new grid
+        self.drawn = [['   '] * ROWS for col in range(COLUMNS)]
+        self.dirty_rects = []
+        self.full_update = True
+        self.overlay_rect = None # the area covered by the overlay drawn last frame
+    def _square_rect(self, col: int, row: int) -> pygame.Rect:
+        '''Returns the area of the window that the square at (col, row) is drawn in'''
+        x = self.top_left_corner[0] + self.square_size * col
+        y = self.top_left_corner[1] + self.square_size * row
+        return pygame.Rect(x, y, self.square_size, self.square_size)
+    def draw(self, field: Field, overlay: list[str] = None):
+        '''
+        Redraws every square of the field that is different from the last frame,
+        then draws the lines of overlay text on top of the field if there are any
+        '''
+        if self.overlay_rect is not None:
+            self._clear_overlay()
+
+        for col, (column, drawn_column) in enumerate(zip(field.field, self.drawn)):
+            if column[:ROWS] == drawn_column:
+                continue
+
+            for row in range(ROWS):
+                square = column[row]
+                if square == drawn_column[row]:
+                    continue
+
+                rect = self._square_rect(col, row)
+                if square == '   ':
+                    self.surface.blit(self.grid, rect, area = rect)
+                else:
+                    _sprite_cache.blit(self.surface, square, rect.x, rect.y, self.square_size)
+                self.dirty_rects.append(rect)
+                drawn_column[row] = square
+
+        if overlay:
+            self._draw_overlay(overlay)
+    def _clear_overlay(self):
+        '''Erases the overlay, marking the squares underneath it to be redrawn'''
+        rect = self.overlay_rect
+        self.surface.blit(self.grid, rect, area = rect)
+        self.dirty_rects.append(rect)
+        self.overlay_rect = None
+
+        for col in range(COLUMNS):
+            for row in range(ROWS):
+                if self._square_rect(col, row).colliderect(rect):
+                    self.drawn[col][row] = None
+    def _draw_overlay(self, lines: list[str]):
+        '''Draws lines of text in the top left corner of the window'''
+        font = _overlay_font()
+        y = 0
+        rects = []
+        for line in lines:
+            text = font.render(line, True, OVERLAY_COLOR, (0, 0, 0))
+            rects.append(self.surface.blit(text, (0, y)))
+            y += text.get_height()
+        self.overlay_rect = rects[0].unionall(rects[1:])
+        self.dirty_rects.append(self.overlay_rect)
+    def update(self):
+        '''Sends the squares that were redrawn to the display, or the whole window after it was resized'''
+        if self.full_update:
+            pygame.display.flip()
+            self.full_update = False
+        elif self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+        self.dirty_rects = []
+
+_font = None
+
+def _overlay_font() -> pygame.font.Font:
+    '''Returns the font of the overlay text, loading it the first time'''
+    global _font
+    if _font is None:
+        _font = pygame.font.Font(None, OVERLAY_FONT_SIZE)
+    return _font
+
+class SpriteCache:
+    '''
+    Keeps every block, in each color and state, already drawn on its own surface so that drawing a block is one blit.
+    Renderer.draw draws every square of the field, the faller included, through blit.
+    The blocks are kept for the last few square sizes only.
+    '''
+    def __init__(self, max_sizes: int = SPRITE_SIZES) -> None:
+        '''Initializes variables'''
+        self.max_sizes = max_sizes
+        self.sizes = OrderedDict() # the sprites of each square size, by square string, least recently used first
+    def _render(self, square: str, square_size: int) -> pygame.Surface:
+        '''Draws one block on a new surface'''
+        sprite = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+        _draw_block(sprite, square[1], 0, 0, square_size)
+        if square[0] == '*':
+            # matched blocks are lighter so they stand out before they are deleted
+            sprite.fill((120, 120, 120), special_flags = pygame.BLEND_RGB_ADD)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+    def sprites(self, square_size: int) -> dict[str, pygame.Surface]:
+        '''Returns the sprites of one square size, drawing them if this size is new'''
+        if square_size in self.sizes:
+            self.sizes.move_to_end(square_size)
+        else:
+            self.sizes[square_size] = {}
+            if len(self.sizes) > self.max_sizes:
+                self.sizes.popitem(last = False)
+        return self.sizes[square_size]
+    def blit(self, surface: pygame.Surface, square: str, x: int | float, y: int | float, square_size: int):
+        '''Draws a block for the square string (such as '[R]' or '*R*') with its top left corner at (x, y)'''
+        sprites = self.sprites(square_size)
+        sprite = sprites.get(square)
+        if sprite is None:
+            sprite = self._render(square, square_size)
+            sprites[square] = sprite
+        surface.blit(sprite, (x, y))
+
+_sprite_cache = SpriteCache()
+
+class GridCache:
+    '''Keeps the empty grid drawn on an off-screen surface, along with its geometry, until the window changes size'''
+    def __init__(self) -> None:
+        '''Initializes variables'''
+        self.window_size = None
+        self.grid = None
+        self.square_size = 0
+        self.top_left_corner = (0, 0)
+    def get(self, window_size: tuple[int, int]) -> tuple[pygame.Surface, int, tuple[int | float]]:
+        '''Returns the grid surface, the square size and the top left corner of the grid for a window size'''
+        if window_size != self.window_size:
+            self.grid = pygame.Surface(window_size)
+            self.grid.fill((0, 0, 0))
+            self.square_size, self.top_left_corner = draw_grid(self.grid)
+            if pygame.display.get_surface() is not None:
+                self.grid = self.grid.convert()
+            self.window_size = window_size
+        return self.grid, self.square_size, self.top_left_corner
+
+_grid_cache = GridCache()
 
 def draw_grid(surface: pygame.Surface):
     '''Draws a 6x13 grid to represent the the empty field'''
@@ -89,87 +370,22 @@ def draw_grid(surface: pygame.Surface):
 
     return square_size, top_left_corner
 
-def draw_faller(surface: pygame.Surface, field: Faller, square_size: int|float, top_left_corner: (tuple[int|float])):
-    '''Draws the faller on the field as three colored rectangles'''
-    # represent each letter as a different color in rgb
-    fill_colors = {
-        'R': (255, 0, 0),
-        'O': (255, 102, 0),
-        'Y': (255, 234, 0),
-        'G': (0, 255, 0),
-        'B': (0, 170, 255),
-        'I': (0, 0, 255),
-        'P': (166, 0, 255)
-        }
-
-    highlights = {
-        'R': (255, 122, 122),
-        'O': (255, 143, 69),
-        'Y': (255, 241, 92),
-        'G': (94, 255, 94),
-        'B': (105, 205, 255),
-        'I': (99, 99, 255),
-        'P': (198, 92, 255)
-    }
-
-    shadows = {
-        'R': (186, 3, 0),
-        'O': (196, 79, 0),
-        'Y': (161, 147, 0),
-        'G': (2, 156, 2),
-        'B': (0, 124, 186),
-        'I': (0, 0, 166),
-        'P': (99, 0, 153)
-    }
-
-    faller = field.faller
-
-    for block in range(1, faller.faller_num + 1):
-        block -= 1
-        color = faller.faller[block][1]
-        fill_color = fill_colors[color]
-
-        highlight = highlights[color]
-        shadow = shadows[color]
-        col_index = faller.faller_col
-        
-        x = top_left_corner[0] + square_size * col_index 
-        y = HEIGHT_MARGIN + square_size * (faller.faller_spot - block - 1)
-        
-        square = pygame.Rect(x, y, square_size, square_size)
-        pygame.draw.rect(surface, fill_color, square, border_radius = 5)
-        # draw right border
-        pygame.draw.line(surface, shadow, (x + square_size - BORDER, y + BORDER), (x + square_size - BORDER, (y + square_size - BORDER)), 5)
-        # draw left border
-        pygame.draw.line(surface, highlight, (x + BORDER, y + BORDER + 1), (x + BORDER, (y + square_size - BORDER)), 5)
-        # draw top border
-        pygame.draw.line(surface, highlight, (x + BORDER + 1, y + BORDER), (x - BORDER + square_size, y + BORDER), 5)
-        # draw bottom border
-        pygame.draw.line(surface, shadow, (x + BORDER, y + square_size - BORDER), (x + square_size - BORDER, (y + square_size - BORDER)), 5)
-        
-        delete_previous_blocks(surface, faller, x, y, square_size)
-
-def delete_previous_blocks(surface: pygame.Surface, faller: Faller, x: int | float, y: int | float, square_size: int | float):
-    '''Replaces the square right above the faller with a black square if all 3 blocks in the faller have entered the field'''
-    if faller.faller_num == 3:
-        y -= square_size
-        rect = pygame.Rect(x + BORDER, y + BORDER, square_size - 4, square_size - 4)
-        pygame.draw.rect(surface, (0, 0, 0), rect)
-
-def delete_entire_faller(surface: pygame.Surface, field: Field, top_left_corner: (tuple[int|float]), square_size: int | float):
-    '''Replaces each square that does not have a frozen block in it with a black square of square_size width'''
-    field = field.field
-    for col in range(COLUMNS):
-        for row in range(ROWS):
-            if field[col][row] == '   ':
-                x = top_left_corner[0] + square_size * col
-                y = HEIGHT_MARGIN + square_size * row
-                _draw_black_box(surface, x, y, square_size)
-
-def _draw_black_box(surface: pygame.Surface, x: int | float, y: int | float, square_size: int | float):
-    '''Draws a black square of square_size width at the coord (x, y) on the given surface'''
-    rect = pygame.Rect(x + BORDER, y + BORDER, square_size - 4, square_size - 4)
-    pygame.draw.rect(surface, (0, 0, 0), rect)
-        
+def _draw_block(surface: pygame.Surface, color: str, x: int | float, y: int | float, square_size: int | float):
+    '''Draws one block of the given color with its top left corner at (x, y)'''
+    fill_color = FILL_COLORS[color]
+    highlight = HIGHLIGHTS[color]
+    shadow = SHADOWS[color]
+
+    square = pygame.Rect(x, y, square_size, square_size)
+    pygame.draw.rect(surface, fill_color, square, border_radius = 5)
+    # draw right border
+    pygame.draw.line(surface, shadow, (x + square_size - BORDER, y + BORDER), (x + square_size - BORDER, (y + square_size - BORDER)), 5)
+    # draw left border
+    pygame.draw.line(surface, highlight, (x + BORDER, y + BORDER + 1), (x + BORDER, (y + square_size - BORDER)), 5)
+    # draw top border
+    pygame.draw.line(surface, highlight, (x + BORDER + 1, y + BORDER), (x - BORDER + square_size, y + BORDER), 5)
+    # draw bottom border
+    pygame.draw.line(surface, shadow, (x + BORDER, y + square_size - BORDER), (x + square_size - BORDER, (y + square_size - BORDER)), 5)
+
 if __name__ == '__main__':
     run()
@@ -0,0 +1,152 @@
+from field_class import Field, GameOverError, InvalidMoveError
+from board import Board
+import columns_logic
+import random
+import struct
+
+# a replay is a header followed by one byte for every call made to the field, in order
+MAGIC = b'CRPL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBQH') # magic, version, cols, rows, seed, keyframe interval
+
+CREATE = 0
+TICK = 1
+DROP = 2 # a tick the player asked for
+LEFT = 3
+RIGHT = 4
+ROTATE = 5
+KEYFRAME = 6 # followed by the field as a board, one byte per square
+
+KEYFRAME_INTERVAL = 256 # how many ticks apart the keyframes are
+
+class ReplayError(Exception):
+    pass
+
+class Recorder:
+    '''
+    Passes the calls that move the game along to a field, recording each one.
+    The field has to get all of its randomness from a random.Random seeded with seed for the replay to be exact.
+    '''
+    def __init__(self, field: Field, seed: int, keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        '''Initializes variables. Raises a ValueError if a value doesn't fit in the header, before anything is recorded.'''
+        if not 0 <= seed < 2 ** 64:
+            raise ValueError(f'The seed must be from 0 to 2 ** 64 - 1, not {seed}')
+        if not 0 < keyframe_interval < 2 ** 16:
+            raise ValueError(f'The keyframe interval must be from 1 to 65535, not {keyframe_interval}')
+        if not (field.cols < 256 and field.rows < 256):
+            raise ValueError(f'A {field.cols}x{field.rows} field is too big to record')
+        self.field = field
+        self.seed = seed
+        self.keyframe_interval = keyframe_interval
+        self.ticks = 0
+        self.events = bytearray()
+    def create_faller(self):
+        '''Creates a new faller'''
+        self.events.append(CREATE)
+        self.field.create_faller()
+    def move_faller_left(self):
+        '''Moves the faller one column to the left'''
+        self.events.append(LEFT)
+        self.field.move_faller_left()
+    def move_faller_right(self):
+        '''Moves the faller one column to the right'''
+        self.events.append(RIGHT)
+        self.field.move_faller_right()
+    def rotate_faller(self):
+        '''Rotates the faller'''
+        self.events.append(ROTATE)
+        self.field.rotate_faller()
+    def pass_time(self, drop: bool = False):
+        '''Passes time in the field, adding a keyframe every keyframe_interval ticks'''
+        self.events.append(DROP if drop else TICK)
+        self.ticks += 1
+        self.field.pass_time()
+        if self.ticks % self.keyframe_interval == 0:
+            self.events.append(KEYFRAME)
+            self.events += Board.from_field(self.field.field).cells
+    def to_bytes(self) -> bytes:
+        '''Returns the replay of everything recorded so far'''
+        header = HEADER.pack(MAGIC, VERSION, self.field.cols, self.field.rows, self.seed, self.keyframe_interval)
+        return header + self.events
+
+def new_field(cols: int, rows: int, seed: int) -> Field:
+    '''Returns an empty field whose fallers only depend on the seed, for recording or playing back a replay'''
+    return Field(columns_logic.create_empty_state(rows, cols), rand = random.Random(seed))
+
+class Replay:
+    '''A recorded game that can be played back without drawing it'''
+    def __init__(self, data: bytes) -> None:
+        '''Reads the header of a replay and finds its keyframes'''
+        if len(data) < HEADER.size:
+            raise ReplayError('Replay is too short')
+        magic, version, self.cols, self.rows, self.seed, self.keyframe_interval = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError('Not a replay of this version')
+        self.events = memoryview(data)[HEADER.size:]
+
+        self.keyframes = [] # (tick, offset of the board in events) of each keyframe
+        self.ticks = 0
+        board_size = self.cols * self.rows
+        i = 0
+        while i < len(self.events):
+            event = self.events[i]
+            if event == TICK or event == DROP:
+                self.ticks += 1
+            elif event == KEYFRAME:
+                self.keyframes.append((self.ticks, i + 1))
+                i += board_size
+            elif event > KEYFRAME:
+                raise ReplayError(f'Unknown event {event} at byte {HEADER.size + i}')
+            i += 1
+    def playback(self, field: Field):
+        '''
+        Plays the replay on a field made by new_field, yielding the number of ticks passed after each tick.
+        Stops early if the game ends.
+        '''
+        events = self.events
+        board_size = self.cols * self.rows
+        ticks = 0
+        i = 0
+        while i < len(events):
+            event = events[i]
+            i += 1
+            try:
+                if event == TICK or event == DROP:
+                    ticks += 1
+                    field.pass_time()
+                elif event == CREATE:
+                    field.create_faller()
+                elif event == LEFT:
+                    field.move_faller_left()
+                elif event == RIGHT:
+                    field.move_faller_right()
+                elif event == ROTATE:
+                    field.rotate_faller()
+                else:
+                    i += board_size
+            except InvalidMoveError:
+                pass
+            except GameOverError:
+                return
+
+            if event == TICK or event == DROP:
+                yield ticks
+    def play(self, until_tick: int = None) -> Field:
+        '''Plays the replay on a new field without drawing it, up to just after tick until_tick if it is given, and returns the field'''
+        field = new_field(self.cols, self.rows, self.seed)
+        for ticks in self.playback(field):
+            if ticks == until_tick:
+                break
+        return field
+    def keyframe(self, tick: int) -> tuple[int, Board]:
+        '''Returns the last keyframe at or before a tick as (its tick, the field as a board), without playing the replay'''
+        best = None
+        for keyframe_tick, offset in self.keyframes:
+            if keyframe_tick > tick:
+                break
+            best = (keyframe_tick, offset)
+        if best is None:
+            return 0, Board(self.cols, self.rows)
+
+        keyframe_tick, offset = best
+        return keyframe_tick, Board(self.cols, self.rows, bytearray(self.events[offset:offset + self.cols * self.rows]))
@@ -0,0 +1,188 @@
+from replay import Replay
+from collections import namedtuple
+import bisect
+import mmap
+import os
+import struct
+
+# a store is a header, then index blocks and replays in the order they were appended.
+# each index block has room for a fixed number of entries and points to the next block once it is full,
+# so the only bytes ever written over are the unused entries of the last block, its counts, and the header.
+# when a writer is closed, it adds a table of every game id, sorted, so a game can be found by id without
+# reading the whole index; the games appended after the last table are the only ones that have to be read.
+MAGIC = b'CRST'
+VERSION = 2
+HEADER = struct.Struct('<4sBxxxIQQ') # magic, version, entries per block, offset of the id table (0 for none), games in it
+BLOCK_HEADER = struct.Struct('<QI4x') # offset of the next block (0 for none), number of entries used
+ENTRY = struct.Struct('<QQIi') # game id, offset of the replay, length of the replay, score
+ID_ENTRY = struct.Struct('<QQ') # game id, number of the game, sorted by id and then number
+
+ENTRIES_PER_BLOCK = 4096
+
+Entry = namedtuple('Entry', ['game_id', 'offset', 'length', 'score'])
+
+class StoreError(Exception):
+    pass
+
+def _block_size(entries_per_block: int) -> int:
+    '''Returns the number of bytes in an index block'''
+    return BLOCK_HEADER.size + ENTRY.size * entries_per_block
+
+def _read_header(data: bytes) -> tuple[int, int, int]:
+    '''
+    Checks the header of a store and returns the number of entries in each index block,
+    the offset of the id table and the number of games in it
+    '''
+    if len(data) < HEADER.size:
+        raise StoreError('Store is too short')
+    magic, version, entries_per_block, ids_offset, ids_count = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or entries_per_block == 0:
+        raise StoreError('Not a replay store of this version')
+    return entries_per_block, ids_offset, ids_count
+
+def _read_blocks(read, entries_per_block: int) -> tuple[list[int], int]:
+    '''
+    Follows the chain of index blocks, using read(offset, size) to read the file.
+    Returns the offset of every block and the number of entries used in the last one.
+    '''
+    blocks = []
+    offset = HEADER.size
+    while True:
+        blocks.append(offset)
+        next_block, used = BLOCK_HEADER.unpack(read(offset, BLOCK_HEADER.size))
+        if used > entries_per_block:
+            raise StoreError(f'Index block at {offset} is corrupt')
+        if next_block == 0:
+            return blocks, used
+        offset = next_block
+
+class ReplayWriter:
+    '''Appends replays to a store, creating the store if it doesn't exist'''
+    def __init__(self, path: str, entries_per_block: int = ENTRIES_PER_BLOCK) -> None:
+        '''Opens the store and finds where the next entry goes'''
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as store_file:
+                store_file.write(HEADER.pack(MAGIC, VERSION, entries_per_block, 0, 0))
+                store_file.write(bytes(_block_size(entries_per_block)))
+
+        self.file = open(path, 'r+b')
+        self.entries_per_block, _, self.ids_count = _read_header(self._read(0, HEADER.size))
+        self.blocks, self.used = _read_blocks(self._read, self.entries_per_block)
+        self.block = self.blocks[-1]
+    def _read(self, offset: int, size: int) -> bytes:
+        '''Returns size bytes of the store starting at offset'''
+        self.file.seek(offset)
+        return self.file.read(size)
+    def _write(self, offset: int, data: bytes):
+        '''Writes bytes over the store starting at offset'''
+        self.file.seek(offset)
+        self.file.write(data)
+    def append(self, game_id: int, replay: bytes, score: int = 0):
+        '''Adds a replay to the end of the store'''
+        if self.used == self.entries_per_block:
+            # the last block is full, so a new one goes at the end and the full one points to it
+            new_block = self.file.seek(0, os.SEEK_END)
+            self.file.write(bytes(_block_size(self.entries_per_block)))
+            self._write(self.block, BLOCK_HEADER.pack(new_block, self.used))
+            self.blocks.append(new_block)
+            self.block = new_block
+            self.used = 0
+
+        # the replay is written before the entry that points to it, and the entry before the count that includes it
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(replay)
+        self._write(self.block + BLOCK_HEADER.size + ENTRY.size * self.used, ENTRY.pack(game_id, offset, len(replay), score))
+        self.used += 1
+        self._write(self.block, BLOCK_HEADER.pack(0, self.used))
+    def _write_ids(self):
+        '''Adds a table of the ids of every game to the end of the store and points the header to it'''
+        ids = []
+        for number, block in enumerate(self.blocks):
+            used = self.used if block == self.block else self.entries_per_block
+            entries = self._read(block + BLOCK_HEADER.size, ENTRY.size * used)
+            first = number * self.entries_per_block
+            ids.extend((game_id, first + spot) for spot, (game_id, *rest) in enumerate(ENTRY.iter_unpack(entries)))
+        ids.sort()
+
+        # the table is written before the header that points to it
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(b''.join(ID_ENTRY.pack(*id_entry) for id_entry in ids))
+        self._write(0, HEADER.pack(MAGIC, VERSION, self.entries_per_block, offset, len(ids)))
+        self.ids_count = len(ids)
+    def close(self):
+        '''Adds a new id table if games were appended since the last one, and closes the store file'''
+        if self.ids_count != (len(self.blocks) - 1) * self.entries_per_block + self.used:
+            self._write_ids()
+        self.file.close()
+    def __enter__(self) -> 'ReplayWriter':
+        '''Returns the writer for a with statement'''
+        return self
+    def __exit__(self, *args):
+        '''Closes the store at the end of a with statement'''
+        self.close()
+
+class ReplayStore:
+    '''
+    Reads a store through mmap, so that any game can be found and read without loading the rest of the file.
+    Only the offsets of the index blocks are kept in memory.
+    '''
+    def __init__(self, path: str) -> None:
+        '''Maps the store into memory and finds its index blocks'''
+        with open(path, 'rb') as store_file:
+            self.map = mmap.mmap(store_file.fileno(), 0, access = mmap.ACCESS_READ)
+        self.entries_per_block, self.ids_offset, self.ids_count = _read_header(self.map[:HEADER.size])
+        self.blocks, used = _read_blocks(lambda offset, size: self.map[offset:offset + size], self.entries_per_block)
+        self.count = (len(self.blocks) - 1) * self.entries_per_block + used
+        if self.ids_count > self.count or self.ids_offset + ID_ENTRY.size * self.ids_count > len(self.map):
+            raise StoreError('The id table is corrupt')
+    def __len__(self) -> int:
+        '''Returns the number of games in the store'''
+        return self.count
+    def entry(self, number: int) -> Entry:
+        '''Returns the index entry of the game that was appended number-th, counting from 0'''
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        block, spot = divmod(number, self.entries_per_block)
+        return Entry(*ENTRY.unpack_from(self.map, self.blocks[block] + BLOCK_HEADER.size + ENTRY.size * spot))
+    def data(self, entry: Entry) -> memoryview:
+        '''Returns the bytes of a replay without copying them'''
+        return memoryview(self.map)[entry.offset:entry.offset + entry.length]
+    def replay(self, number: int) -> Replay:
+        '''Returns the replay of the game that was appended number-th, copied out of the store so it can outlive it'''
+        return Replay(bytes(self.data(self.entry(number))))
+    def _id_entry(self, spot: int) -> tuple[int, int]:
+        '''Returns (game id, number of the game) at a spot in the id table'''
+        return ID_ENTRY.unpack_from(self.map, self.ids_offset + ID_ENTRY.size * spot)
+    def find(self, game_id: int) -> Entry:
+        '''
+        Returns the entry of the first game with an id, or None if there isn't one.
+        The id table is searched with bisect, and only the games appended after it was written are read one by one.
+        '''
+        spot = bisect.bisect_left(range(self.ids_count), game_id, key = lambda spot: self._id_entry(spot)[0])
+        if spot < self.ids_count:
+            found_id, number = self._id_entry(spot)
+            if found_id == game_id:
+                return self.entry(number)
+
+        for number in range(self.ids_count, self.count):
+            entry = self.entry(number)
+            if entry.game_id == game_id:
+                return entry
+        return None
+    def entries(self):
+        '''Yields every entry in the order the games were appended'''
+        for number in range(self.count):
+            yield self.entry(number)
+    def __iter__(self):
+        '''Yields (entry, replay bytes) of every game one at a time, so memory use doesn't grow with the store'''
+        for entry in self.entries():
+            yield entry, self.data(entry)
+    def close(self):
+        '''Unmaps the store'''
+        self.map.close()
+    def __enter__(self) -> 'ReplayStore':
+        '''Returns the store for a with statement'''
+        return self
+    def __exit__(self, *args):
+        '''Unmaps the store at the end of a with statement'''
+        self.close()
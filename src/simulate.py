@@ -0,0 +1,84 @@
+from field_class import Field, GameOverError, InvalidMoveError
+import columns_logic
+import random
+import hashlib
+from collections import namedtuple
+
+COLUMNS = 6
+ROWS = 13
+
+# what a policy can tell the faller to do on each tick (None leaves it alone)
+LEFT = 'left'
+RIGHT = 'right'
+ROTATE = 'rotate'
+
+GameStats = namedtuple('GameStats', ['seed', 'ticks', 'pieces', 'cleared', 'max_cascade'])
+
+def idle_policy(field: Field, rand: random.Random):
+    '''Never moves the faller'''
+    return None
+
+def random_policy(field: Field, rand: random.Random):
+    '''Moves or rotates the faller at random about half of the time'''
+    return rand.choice([LEFT, RIGHT, ROTATE, None, None, None])
+
+def game_seed(seed: int, game: int) -> int:
+    '''Returns the seed of one game, which only depends on the master seed and the number of the game'''
+    digest = hashlib.sha256(f'{seed}:{game}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def _apply(field: Field, action):
+    '''Moves or rotates the faller, ignoring moves that are blocked'''
+    try:
+        if action == LEFT:
+            field.move_faller_left()
+        elif action == RIGHT:
+            field.move_faller_right()
+        elif action == ROTATE:
+            field.rotate_faller()
+    except InvalidMoveError:
+        pass
+
+def play_game(policy, seed: int, max_ticks: int, rows: int = ROWS, cols: int = COLUMNS) -> GameStats:
+    '''
+    Plays one game without a display, asking the policy what to do with the faller on every tick,
+    until the game is over or max_ticks ticks have passed
+    '''
+    rand = random.Random(f'{seed}-policy')
+    field = Field(columns_logic.create_empty_state(rows, cols), rand = random.Random(seed))
+    ticks = 0
+    pieces = 0
+    cleared = 0
+    max_cascade = 0
+
+    try:
+        while ticks < max_ticks and not field.game_over:
+            if field.need_new_faller and field.matching:
+                # the whole chain is resolved at once instead of one tick for each step
+                result = field.resolve_cascades()
+                cleared += sum(result.cleared)
+                max_cascade = max(max_cascade, result.chain)
+
+            if field.need_new_faller and not field.matching:
+                field.create_faller()
+                pieces += 1
+
+            _apply(field, policy(field, rand))
+
+            try:
+                field.pass_time()
+            except InvalidMoveError:
+                pass
+            ticks += 1
+    except GameOverError:
+        pass
+
+    return GameStats(seed, ticks, pieces, cleared, max_cascade)
+
+def simulate(n_games: int, policy = random_policy, seed: int = 0, max_ticks: int = 100000) -> list[GameStats]:
+    '''Plays n_games games one after another as fast as possible and returns the stats of each game'''
+    return [play_game(policy, game_seed(seed, game), max_ticks) for game in range(n_games)]
+
+if __name__ == '__main__':
+    for stats in simulate(10):
+        print(stats)
@@ -0,0 +1,27 @@
+import benchmark_field
+import random
+import unittest
+
+class BenchmarkFieldTest(unittest.TestCase):
+    def test_boards(self):
+        '''Tests that each kind of board has the given size and leaves the top rows empty'''
+        for kind in benchmark_field.KINDS:
+            board = benchmark_field.make_board(kind, 6, 13, random.Random(0))
+            self.assertEqual(len(board), 6)
+            self.assertTrue(all(len(column) == 13 and column[:4] == ['   '] * 4 for column in board))
+        cascade = benchmark_field.make_board('cascade', 6, 13, random.Random(0))
+        self.assertEqual({square for column in cascade for square in column[4:]}, {' R ', ' O ', ' Y '})
+    def test_every_benchmark_runs(self):
+        '''Tests that every benchmark can be timed with and without a board engine'''
+        for engine in (None, 'board.Board'):
+            results = benchmark_field.run_benchmarks(engine, ((6, 13),), calls = 2, repeats = 1)
+            self.assertEqual(len(results['results']), len(benchmark_field.BENCHMARKS) * len(benchmark_field.KINDS))
+            self.assertIn('pass_time_cycle/cascade/6x13', results['results'])
+    def test_compare(self):
+        '''Tests that only benchmarks that got slower than the threshold are regressions'''
+        baseline = {'results': {'a': {'best_us': 10.0}, 'b': {'best_us': 10.0}, 'c': {'best_us': 10.0}}}
+        results = {'results': {'a': {'best_us': 10.5}, 'b': {'best_us': 12.0}, 'd': {'best_us': 50.0}}}
+        self.assertEqual(benchmark_field.compare(results, baseline, 0.1), [('b', 10.0, 12.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from bitboard import BitBoard
+from board import Board
+from field_class import Field
+import test_field_class
+import columns_logic
+import functools
+import random
+import unittest
+from unittest import mock
+
+# the scenarios in FieldTest that only find, delete and drop matches
+BOARD_SCENARIOS = ['test_has_field_given_when_created', 'test_matches', 'test_deletes_matches', 'test_4_in_a_row_match', 
+                   'test_5_in_a_row_match', 'test_multiple_matches_in_one_drop', 'test_square_drop_down']
+
+class BitBoardFieldTest(unittest.TestCase):
+    '''Runs the board scenarios from test_field_class.py with a Field that uses a BitBoard engine'''
+    def setUp(self):
+        '''Makes every Field created by the scenarios use a BitBoard engine'''
+        patcher = mock.patch.object(test_field_class, 'Field', functools.partial(Field, engine = BitBoard))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        test_field_class.FieldTest.setUp(self)
+
+for name in BOARD_SCENARIOS + [name for name in vars(test_field_class.FieldTest) if name.startswith('_create')]:
+    setattr(BitBoardFieldTest, name, getattr(test_field_class.FieldTest, name))
+
+class BitBoardTest(unittest.TestCase):
+    def _create_random_field(self, rand: random.Random):
+        '''Creates a random 6x13 field with gaps between the squares'''
+        field = columns_logic.create_empty_state(13, 6)
+        for column in field:
+            for row in range(13):
+                column[row] = rand.choice([' R ', ' G ', ' B ', '|G|', '   ', '   '])
+        return field
+    def test_field_view_matches_original_field(self):
+        '''Tests that the field view of a bitboard is the same as the field it was created from'''
+        field = self._create_random_field(random.Random(0))
+        self.assertEqual(BitBoard.from_field(field).field, field)
+    def test_same_results_as_board(self):
+        '''Tests that a bitboard matches, deletes and drops the same squares as a Board'''
+        rand = random.Random(1)
+        for i in range(50):
+            field = self._create_random_field(rand)
+            bitboard = BitBoard.from_field(field)
+            board = Board.from_field(field)
+
+            self.assertEqual(bitboard.match_squares(), board.match_squares())
+            self.assertEqual(bitboard.field, board.field)
+            bitboard.delete_matches()
+            board.delete_matches()
+            self.assertEqual(bitboard.field, board.field)
+            bitboard.drop_everything()
+            board.drop_everything()
+            self.assertEqual(bitboard.field, board.field)
+
+if __name__ == '__main__':
+    unittest.main()
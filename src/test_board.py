@@ -0,0 +1,80 @@
+from board import Board, encode_square, decode_square, EMPTY
+from field_class import Field
+import columns_logic
+import random
+import unittest
+
+class BoardTest(unittest.TestCase):
+    def setUp(self):
+        '''Sets up fields for the following tests'''
+        self.field = [[' X ', ' X ', ' X ', ' X '],
+                      ['   ', '   ', '[Y]', '|Y|'],
+                      ['   ', '*S*', ' Y ', ' Y '],
+                      ['   ', '   ', ' Z ', ' Y ']]
+        self.board = Board.from_field(self.field)
+    def _create_random_field(self, seed: int):
+        '''Creates a random 6x13 field of frozen squares that have already dropped down'''
+        rand = random.Random(seed)
+        field = columns_logic.create_empty_state(13, 6)
+        for column in field:
+            height = rand.randint(0, 13)
+            for row in range(13 - height, 13):
+                column[row] = f' {rand.choice("RGB")} '
+        return field
+    def test_squares_encode_to_one_byte(self):
+        '''Tests that every square string encodes to a single byte and decodes back to the same string'''
+        for square in ['   ', ' R ', '[O]', '|P|', '*B*', ' X ']:
+            code = encode_square(square)
+            self.assertTrue(0 <= code < 256)
+            self.assertEqual(decode_square(code), square)
+        self.assertEqual(encode_square('   '), EMPTY)
+    def test_field_view_matches_original_field(self):
+        '''Tests that the field view of a board is the same as the field it was created from'''
+        self.assertEqual(self.board.cols, 4)
+        self.assertEqual(self.board.rows, 4)
+        self.assertEqual(len(self.board.cells), 16)
+        self.assertEqual(self.board.field, self.field)
+    def test_match_squares(self):
+        '''Tests that lines of 3 or more squares of the same color are marked as matched'''
+        self.assertEqual(self.board.match_squares(), 7)
+        self.assertTrue(self.board.check_for_matches())
+        self.assertEqual(self.board.field, [['*X*', '*X*', '*X*', '*X*'],
+                                            ['   ', '   ', '[Y]', '*Y*'],
+                                            ['   ', '*S*', ' Y ', '*Y*'],
+                                            ['   ', '   ', ' Z ', '*Y*']])
+    def test_delete_matches(self):
+        '''Tests that matched squares are deleted and the squares above them fall down'''
+        self.board.match_squares()
+        self.board.delete_matches()
+        self.assertFalse(self.board.check_for_matches())
+        self.assertEqual(self.board.field, [['   ', '   ', '   ', '   '],
+                                            ['   ', '   ', '   ', '[Y]'],
+                                            ['   ', '   ', '   ', ' Y '],
+                                            ['   ', '   ', '   ', ' Z ']])
+    def test_drop_everything(self):
+        '''Tests that no empty square is left underneath a square with a color in it'''
+        board = Board.from_field([[' X ', ' Y ', ' X ', ' X '],
+                                  [' Y ', '   ', '   ', ' Z '],
+                                  ['   ', ' X ', '   ', ' X '],
+                                  ['   ', '   ', ' Z ', ' X ']])
+        board.drop_everything()
+        self.assertEqual(board.field, [[' X ', ' Y ', ' X ', ' X '],
+                                       ['   ', '   ', ' Y ', ' Z '],
+                                       ['   ', '   ', ' X ', ' X '],
+                                       ['   ', '   ', ' Z ', ' X ']])
+    def test_same_matches_as_field(self):
+        '''Tests that a board matches and deletes the same squares as a Field'''
+        for seed in range(50):
+            field = Field(self._create_random_field(seed))
+            board = Board.from_field(field.field)
+
+            field.match_squares()
+            board.match_squares()
+            self.assertEqual(board.field, field.field)
+
+            field.delete_matches()
+            board.delete_matches()
+            self.assertEqual(board.field, field.field)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+from board import Board
+from field_class import Field, GameOverError, InvalidMoveError
+import bot
+import columns_logic
+import random
+import replay
+import simulate
+import unittest
+
+class BotTest(unittest.TestCase):
+    def _create_field(self, columns: dict[int, list[str]]) -> Field:
+        '''Returns a 6x13 field with the given colors frozen at the bottom of some columns, top color first'''
+        field = columns_logic.create_empty_state(13, 6)
+        for col, colors in columns.items():
+            field[col][13 - len(colors):] = [f' {color} ' for color in colors]
+        return Field(field, rand = random.Random(0))
+    def test_drop_and_resolve(self):
+        '''Tests that a dropped faller is stacked bottom square first and that its matches are cleared in a chain'''
+        board = Board.from_field(self._create_field({0: ['R', 'R'], 1: ['G', 'B', 'B']}).field)
+        self.assertTrue(bot.drop_piece(board, 0, [board.get(0, 12), board.get(1, 10), board.get(1, 11)]))
+        self.assertEqual(bot.column_heights(board), [5, 3, 0, 0, 0, 0])
+        self.assertEqual(bot.resolve(board), (3, 1))
+        self.assertEqual(bot.column_heights(board), [2, 3, 0, 0, 0, 0])
+        self.assertFalse(bot.drop_piece(board, 0, [1] * 12))
+    def test_rotations(self):
+        '''Tests that the rotations match how Faller.rotate moves its squares'''
+        self.assertEqual(bot.rotations([1, 2, 3]), [[1, 2, 3], [2, 3, 1], [3, 1, 2]])
+    def test_reachable_columns(self):
+        '''Tests that a faller that has entered the field can't move past a column that is too tall'''
+        field = self._create_field({1: ['R'] * 2 + ['G', 'B'] * 5, 4: ['Y', 'B']})
+        field.create_faller('R G B', 3)
+        self.assertEqual(bot.reachable_columns(field), [0, 1, 2, 3, 4, 5])
+        for tick in range(3):
+            field.pass_time()
+        self.assertEqual(bot.reachable_columns(field), [2, 3, 4, 5])
+    def test_chooses_match(self):
+        '''Tests that the bot puts the faller where it clears squares, rotated so the matching color is at the bottom'''
+        field = self._create_field({0: ['P', 'O'], 4: ['Y', 'Y', 'B']})
+        field.create_faller('Y B G', 2)
+        player = bot.Bot(lookahead = 1)
+        self.assertEqual(player.choose(field), bot.Placement(4, 2))
+        self.assertEqual([player.next_action(field) for i in range(5)], [bot.ROTATE, bot.ROTATE, bot.RIGHT, bot.RIGHT, bot.RIGHT])
+    def test_expand_keeps_hash(self):
+        '''Tests that the hash of each placement's board is the same as working it out from scratch, even after clearing squares'''
+        field = self._create_field({0: ['P', 'O'], 4: ['Y', 'Y', 'B'], 5: ['B', 'R', 'B']})
+        board = Board.from_field(field.field)
+        player = bot.Bot()
+        start = bot.Position(0.0, board, None, player.keys.hash_board(board))
+        expanded = player._expand(start, [board.get(4, 10)] * 3, range(6), 1)
+        self.assertEqual(len(expanded), 18)
+        self.assertTrue(any(position.board.cells.count(0) > board.cells.count(0) - 3 for position in expanded))
+        for position in expanded:
+            self.assertEqual(position.hash, player.keys.hash_board(position.board))
+        self.assertTrue(all(depth == 1 for key, depth in zip(player.scores.hashes, player.scores.depths) if key is not None))
+    def test_time_budget(self):
+        '''Tests that the bot still chooses a placement when it has no time to look ahead'''
+        field = self._create_field({})
+        field.create_faller('R G B', 2)
+        self.assertIsInstance(bot.Bot(time_budget = 0).choose(field), bot.Placement)
+    def test_outlasts_random_moves(self):
+        '''Tests that the bot keeps playing long after random moves lose'''
+        # without a time limit the search always goes just as deep, so the game is the same on any machine
+        stats = simulate.play_game(bot.Bot(time_budget = float('inf')).policy, 0, 800)
+        self.assertEqual(stats.ticks, 800)
+        self.assertGreater(stats.cleared, 0)
+        self.assertLess(simulate.play_game(simulate.random_policy, 0, 800).ticks, 800)
+    def test_autoplay_replay(self):
+        '''Tests that a recorded game played by the bot plays back the same, even though the bot looks at the upcoming fallers'''
+        seed = 3
+        player = bot.Bot(time_budget = float('inf'))
+        recorder = replay.Recorder(replay.new_field(6, 13, seed), seed)
+        field = recorder.field
+        try:
+            for tick in range(300):
+                if field.need_new_faller and not field.matching:
+                    recorder.create_faller()
+                # the bot gets a few moves a tick, the same way as it gets one move a frame in the game
+                for move in range(3):
+                    action = player.next_action(field)
+                    try:
+                        if action == bot.LEFT:
+                            recorder.move_faller_left()
+                        elif action == bot.RIGHT:
+                            recorder.move_faller_right()
+                        elif action == bot.ROTATE:
+                            recorder.rotate_faller()
+                    except InvalidMoveError:
+                        pass
+                recorder.pass_time()
+        except GameOverError:
+            pass
+        self.assertEqual(replay.Replay(recorder.to_bytes()).play().field, field.field)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,10 @@
-from field_class import Field, InvalidMoveError
+from field_class import Field, GameOverError, InvalidMoveError
+from faller_class import Faller
+from zobrist import ZobristKeys
+from board import Board
+from bitboard import BitBoard
+import columns_logic
+import random
 import unittest
 
 class FieldTest(unittest.TestCase):
@@ -261,6 +267,227 @@ class FieldTest(unittest.TestCase):
                                        ['   ', '   ', ' Y ', ' Z '],
                                        ['   ', '   ', ' X ', ' X '],
                                        ['   ', '   ', ' Z ', ' X ']])
+    def test_drop_reports_moved_squares(self):
+        '''Tests that dropping and deleting squares return the squares that changed'''
+        field = [['   ', ' Y ', '   ', ' X '],
+                 [' Y ', ' Z ', ' X ', ' X '],
+                 ['   ', '   ', '   ', '   '],
+                 [' X ', '*X*', '*X*', ' Z ']]
+        field = Field(field)
+
+        self.assertEqual(field.drop_everything(), {(0, 1), (0, 2)})
+        self.assertEqual(field.delete_matches(), {(3, 0), (3, 1), (3, 2)})
+        self.assertEqual(field.field, [['   ', '   ', ' Y ', ' X '],
+                                       [' Y ', ' Z ', ' X ', ' X '],
+                                       ['   ', '   ', '   ', '   '],
+                                       ['   ', '   ', ' X ', ' Z ']])
+    def test_faller_moves_without_copying_field(self):
+        '''Tests that moving the faller only changes the columns it moves between'''
+        field = self.field1
+        field.faller = Faller('V W Z', 0)
+        field.need_new_faller = False
+        field.matching = False
+        for i in range(3):
+            field.pass_time()
+
+        columns = list(field.field)
+        field.move_faller_right()
+        self.assertEqual(field.field, [['   ', '   ', '   ', '   '], 
+                                       ['[V]', '[W]', '[Z]', '   '],
+                                       ['   ', '   ', '   ', '   '], 
+                                       ['   ', '   ', '   ', '   '], 
+                                       ['   ', '   ', '   ', '   ']])
+        for column, old_column in zip(field.field, columns):
+            self.assertIs(column, old_column)
+    def test_seeded_fallers(self):
+        '''Tests that fields with the same random source create the same fallers, in columns that are not full'''
+        field = [[' X ', ' X ', ' X ', ' X '], 
+                 ['   ', '   ', '   ', ' X '], 
+                 [' X ', ' X ', ' X ', ' X ']]
+        field1 = Field([col[:] for col in field], rand = random.Random(7))
+        field2 = Field([col[:] for col in field], rand = random.Random(7))
+        upcoming = field1.upcoming_fallers(3)
+        self.assertEqual(upcoming, field2.upcoming_fallers(3))
+
+        for i in range(3):
+            field1.create_faller()
+            field2.create_faller()
+            self.assertEqual(field1.faller.faller, field2.faller.faller)
+            self.assertEqual(field1.faller.faller_col, 1)
+            self.assertEqual(field1.faller.faller, Faller(upcoming[i], 1).faller)
+            field1.faller.freeze()
+            field2.faller.freeze()
+    def test_upcoming_fallers_dont_change_columns(self):
+        '''Tests that looking at the upcoming fallers doesn't change the columns the fallers are put in'''
+        field1 = Field(columns_logic.create_empty_state(13, 6), rand = random.Random(3))
+        field2 = Field(columns_logic.create_empty_state(13, 6), rand = random.Random(3))
+        for i in range(20):
+            field2.upcoming_fallers(i % 4)
+            field1.create_faller()
+            field2.create_faller()
+            self.assertEqual(field1.faller.faller, field2.faller.faller)
+            self.assertEqual(field1.faller.faller_col, field2.faller.faller_col)
+            field1.faller.freeze()
+            field2.faller.freeze()
+    def test_piece_generator(self):
+        '''Tests that the colors of the fallers can come from a piece generator'''
+        field = Field([['   ', '   ', '   ']], piece_generator = lambda rand: 'R G B')
+        field.create_faller()
+        self.assertEqual(field.faller.faller, ['[B]', '[G]', '[R]'])
+    def test_match_only_changed_squares(self):
+        '''Tests that only checking the lines through the squares that changed finds the same matches as checking every square'''
+        field = [['   ', ' X ', ' S ', ' T ', ' S '], 
+                 ['   ', '   ', ' V ', ' X ', ' X '], 
+                 [' U ', ' S ', ' Y ', ' V ', ' X '], 
+                 [' S ', ' T ', ' Y ', ' Y ', ' S '], 
+                 [' X ', ' Y ', ' X ', ' X ', ' Y ']]
+        full_field = Field([col[:] for col in field])
+        full_field.field[1][1] = ' Y '
+        full_field.match_squares()
+
+        changed_field = Field([col[:] for col in field])
+        changed_field.match_squares()
+        changed_field.field[1][1] = ' Y '
+        changed_field.match_squares({(1, 1)})
+        self.assertEqual(changed_field.field, full_field.field)
+        self.assertEqual(changed_field.field, [['   ', ' X ', ' S ', ' T ', ' S '], 
+                                               ['   ', '*Y*', ' V ', ' X ', ' X '], 
+                                               [' U ', ' S ', '*Y*', ' V ', ' X '], 
+                                               [' S ', ' T ', ' Y ', '*Y*', ' S '], 
+                                               [' X ', ' Y ', ' X ', ' X ', '*Y*']])
+    def test_match_squares_moved_down_by_faller(self):
+        '''Tests that squares above a faller that move down with it are matched when it freezes'''
+        e = '   '
+        for engine in [None, Board]:
+            field = Field([[e] * 7, 
+                           [' X '] + [e] * 6, 
+                           [e, e, ' X ', ' Y ', ' Z ', ' Y ', ' Z '], 
+                           [e, e, ' X ', ' Z ', ' Y ', ' Z ', ' Y ']], engine = engine)
+            field.match_squares()
+            field.create_faller('R G B', 0)
+            for i in range(4):
+                field.pass_time()
+            field.move_faller_right() # under the X, which moves down with the faller
+            for i in range(8):
+                field.pass_time()
+            self.assertEqual([column[2] for column in field.field], [e, e, e, e])
+    def _state(self, field: Field):
+        '''Returns everything about a field that a snapshot should bring back'''
+        faller = field.faller
+        if faller != []:
+            faller = (faller.faller[:], faller.faller_col, faller.faller_spot, faller.faller_num, faller.landed, faller.frozen)
+        return ([col[:] for col in field.field], [col[:] for col in field.field_wo_faller], faller,
+            field.need_new_faller, field.matching, field.game_over, list(field.upcoming))
+    def _play(self, field: Field, rand: random.Random, ticks: int):
+        '''Moves the faller at random and passes time, putting each new faller in a column chosen by rand'''
+        moves = [field.move_faller_left, field.move_faller_right, field.rotate_faller, field.pass_time, field.pass_time]
+        try:
+            for tick in range(ticks):
+                if field.need_new_faller and not field.matching:
+                    open_cols = [col for col in range(field.cols) if '   ' in field.field[col]]
+                    field.create_faller(col_num = rand.choice(open_cols) if open_cols else None)
+                try:
+                    rand.choice(moves)()
+                except InvalidMoveError:
+                    pass
+        except GameOverError:
+            pass
+    def test_snapshot_and_restore(self):
+        '''Tests that restoring a snapshot brings back the whole state, and that the game goes on the same way from it'''
+        for seed in range(20):
+            field = Field(columns_logic.create_empty_state(6, 4), rand = random.Random(seed))
+            self._play(field, random.Random(seed), seed * 5)
+            snapshot = field.snapshot()
+            state = self._state(field)
+
+            self._play(field, random.Random(-seed), 40)
+            field.restore(snapshot)
+            self.assertEqual(self._state(field), state)
+
+            # the upcoming fallers come back, so the same moves give the same game as long as they last
+            field.upcoming_fallers(20)
+            snapshot = field.snapshot()
+            self._play(field, random.Random(seed), 40)
+            after = self._state(field)
+            field.restore(snapshot)
+            self._play(field, random.Random(seed), 40)
+            self.assertEqual(self._state(field), after)
+    def test_snapshot_is_packed(self):
+        '''Tests that a snapshot holds the squares as bytes and doesn't change when the field does'''
+        field = Field(columns_logic.create_empty_state(13, 6), rand = random.Random(1))
+        field.pass_time()
+        field.create_faller('R G B', 2)
+        field.pass_time()
+        snapshot = field.snapshot()
+        self.assertEqual(len(snapshot.squares), 6 * 13)
+        self.assertEqual([col for col, column in snapshot.changed_columns], [2])
+
+        field.pass_time()
+        field.move_faller_left()
+        self.assertNotEqual(field.snapshot(), snapshot)
+        field.restore(snapshot)
+        self.assertEqual(field.snapshot(), snapshot)
+        self.assertEqual(field.field[2][:2], ['[B]', '   '])
+    def test_restore_hash(self):
+        '''Tests that the hash of a field that keeps one is restored too'''
+        keys = ZobristKeys()
+        field = Field(columns_logic.create_empty_state(13, 6), rand = random.Random(4), zobrist = keys)
+        self._play(field, random.Random(4), 30)
+        snapshot = field.snapshot()
+        self._play(field, random.Random(5), 30)
+        field.restore(snapshot)
+        self.assertEqual(field.hash, keys.hash_field(field))
+    def test_resolve_cascades(self):
+        '''Tests that a chain is resolved at once, with the squares and colors cleared in each step'''
+        field = [['   ', '   ', ' G ', ' R '], 
+                 ['   ', ' R ', ' B ', ' G '], 
+                 [' R ', ' B ', ' G ', ' G '], 
+                 [' B ', ' B ', ' G ', ' R ']]
+        for engine in [None, Board, BitBoard]:
+            resolved = Field([col[:] for col in field], engine = engine)
+            result = resolved.resolve_cascades()
+            self.assertEqual(result.chain, 3)
+            self.assertEqual(result.cleared, [3, 3, 3])
+            self.assertEqual(result.colors, {'B': 3, 'G': 3, 'R': 3})
+            self.assertEqual(resolved.field, [['   ', '   ', '   ', '   '], 
+                                              ['   ', '   ', '   ', '   '], 
+                                              ['   ', '   ', '   ', ' G '], 
+                                              ['   ', ' B ', ' G ', ' R ']])
+            self.assertEqual(resolved.field_wo_faller, resolved.field)
+            self.assertFalse(resolved.matching)
+            self.assertEqual(resolved.resolve_cascades().chain, 0)
+    def test_resolve_cascades_with_faller(self):
+        '''Tests that nothing is resolved while a faller is in the field, so moving it doesn't leave a copy behind'''
+        field = Field([['   ', '   ', '   ', '   '], 
+                       ['   ', '   ', '   ', ' R '], 
+                       ['   ', '   ', '   ', ' R ']])
+        field.create_faller('R G B', 0)
+        for i in range(2):
+            field.pass_time()
+        self.assertEqual(field.resolve_cascades(), (0, [], {}))
+        field.move_faller_right()
+        self.assertEqual(field.field[0], ['   ', '   ', '   ', '   '])
+        self.assertEqual(field.field[1], ['[G]', '[B]', '   ', ' R '])
+    def test_resolve_cascades_same_as_passing_time(self):
+        '''Tests that resolving the chain after a faller freezes leaves the field the same as passing time until it is done'''
+        rand = random.Random(0)
+        for i in range(100):
+            field = columns_logic.create_empty_state(8, 5)
+            for column in field:
+                for row in range(3, 8):
+                    column[row] = rand.choice([' R ', ' G ', ' B ', ' Y '])
+            ticked = Field([col[:] for col in field])
+            ticked.match_squares()
+            matched = []
+            while ticked.matching:
+                matched.append(sum(square[0] == '*' for column in ticked.field for square in column))
+                ticked.pass_time()
+
+            resolved = Field([col[:] for col in field], engine = Board if i % 2 else None)
+            result = resolved.resolve_cascades()
+            self.assertEqual(resolved.field, ticked.field)
+            self.assertEqual(result.cleared, matched[:-1])
+            self.assertEqual(sum(result.colors.values()), sum(result.cleared))
     
 
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+from frame_stats import FrameStats
+import csv
+import os
+import tempfile
+import unittest
+
+class FakeClock:
+    '''A clock that only moves when it is told to'''
+    def __init__(self) -> None:
+        self.now = 0.0
+    def __call__(self) -> float:
+        return self.now
+
+class FrameStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+    def _frame(self, stats: FrameStats, tick: float, draw: float):
+        '''Measures one frame that spends the given seconds in the tick and draw phases'''
+        stats.start_frame()
+        self.clock.now += tick
+        stats.mark('tick')
+        self.clock.now += draw
+        stats.mark('draw')
+        stats.end_frame()
+    def _rounded(self, times: tuple[float, ...]) -> tuple[float, ...]:
+        '''Rounds away the error of adding up the fake clock times'''
+        return tuple(round(time, 6) for time in times)
+    def test_percentiles(self):
+        '''Tests that the percentiles are taken from the times of each phase'''
+        stats = FrameStats(100, self.clock)
+        for frame in range(1, 101):
+            self._frame(stats, frame / 1000, 0.002)
+        self.assertEqual(self._rounded(stats.percentiles('tick')), (50.0, 95.0, 99.0))
+        self.assertEqual(self._rounded(stats.percentiles('draw', (50,))), (2.0,))
+        self.assertEqual(stats.percentiles('events', (99,)), (0.0,))
+    def test_ring_buffer_keeps_newest_frames(self):
+        '''Tests that once the buffer is full the oldest frames are overwritten'''
+        stats = FrameStats(4, self.clock)
+        for frame in range(1, 7):
+            self._frame(stats, frame / 1000, 0)
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(self._rounded(stats.percentiles('tick', (1, 100))), (3.0, 6.0))
+    def test_fps(self):
+        '''Tests that the frame rate counts the time between frames as well as the time in them'''
+        stats = FrameStats(10, self.clock)
+        for frame in range(10):
+            self._frame(stats, 0.005, 0.005)
+            self.clock.now += 0.01
+        self.assertAlmostEqual(stats.fps(), 10 / 0.19)
+        self.assertEqual(FrameStats(10, self.clock).fps(), 0.0)
+    def test_write_csv(self):
+        '''Tests that every stored frame is written in order, in milliseconds'''
+        stats = FrameStats(3, self.clock)
+        for frame in range(1, 5):
+            self._frame(stats, frame / 1000, 0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'frames.csv')
+            stats.write_csv(path)
+            with open(path, newline = '') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        self.assertEqual([row['tick_ms'] for row in rows], ['2.000', '3.000', '4.000'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+from board import Board
+from bitboard import BitBoard
+import fuzz_field
+import unittest
+
+class KeepMatchesBoard(Board):
+    '''A broken engine that never deletes matched squares'''
+    def delete_matches(self):
+        pass
+
+class FuzzFieldTest(unittest.TestCase):
+    def test_engines_agree_with_reference(self):
+        '''Tests that the board engines play the same games as the reference field'''
+        self.assertEqual(fuzz_field.fuzz('board.Board', 20, workers = 2), [])
+        self.assertEqual(fuzz_field.fuzz('bitboard.BitBoard', 20, workers = 2), [])
+    def test_regressions(self):
+        '''Tests that the board engines play the fixed regression games the same way as the reference field'''
+        self.assertEqual(fuzz_field.run_regressions(Board), [])
+        self.assertEqual(fuzz_field.run_regressions(BitBoard), [])
+    def test_steps_are_seeded(self):
+        '''Tests that a seed always makes the same game'''
+        self.assertEqual(fuzz_field.generate_steps(5), fuzz_field.generate_steps(5))
+        self.assertNotEqual(fuzz_field.generate_steps(5), fuzz_field.generate_steps(6))
+    def test_finds_and_shrinks_mismatch(self):
+        '''Tests that a broken engine is caught and its game is shrunk to a few steps that still fail'''
+        steps = fuzz_field.generate_steps(0)
+        mismatch = fuzz_field.run_steps(steps, KeepMatchesBoard)
+        self.assertIsNotNone(mismatch)
+        self.assertEqual(mismatch.action, 'tick')
+
+        shrunk = fuzz_field.shrink(steps, KeepMatchesBoard)
+        self.assertIsNotNone(fuzz_field.run_steps(shrunk, KeepMatchesBoard))
+        self.assertLess(len(shrunk), mismatch.step + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import line_index
+import unittest
+
+class LineIndexTest(unittest.TestCase):
+    def test_lines_of_small_field(self):
+        '''Tests that a 3x3 field has 3 vertical lines, 3 horizontal lines and 2 diagonals'''
+        lines = line_index.lines(3, 3)
+        self.assertEqual(len(lines), 8)
+        self.assertIn(((0, 0), (1, 1), (2, 2)), lines)
+        self.assertIn(((0, 2), (1, 1), (2, 0)), lines)
+        self.assertIn(((1, 0), (1, 1), (1, 2)), lines)
+    def test_short_lines_are_left_out(self):
+        '''Tests that lines that are too short for a match are not in the index'''
+        for line in line_index.lines(6, 13) + line_index.lines(20, 2):
+            self.assertTrue(len(line) >= 3)
+        self.assertEqual(len(line_index.lines(20, 2)), 2)
+    def test_lines_through_square(self):
+        '''Tests that each square knows every line it is on and where it is in that line'''
+        through = line_index.lines_through(6, 13)
+        self.assertEqual(len(through[(2, 6)]), 4)
+        for line, position in through[(2, 6)]:
+            self.assertEqual(line[position], (2, 6))
+        self.assertEqual(len(through[(0, 0)]), 3)
+    def test_cached_by_size(self):
+        '''Tests that the lines of a field size are only worked out once'''
+        self.assertIs(line_index.lines(6, 13), line_index.lines(6, 13))
+        self.assertIs(line_index.flat_lines(6, 13), line_index.flat_lines(6, 13))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import parallel
+import simulate
+import unittest
+
+class ParallelTest(unittest.TestCase):
+    def test_same_results_for_any_number_of_workers(self):
+        '''Tests that the totals only depend on the master seed, not on the number of workers or the chunk size'''
+        one_worker = parallel.run_parallel(12, seed = 5, workers = 1, chunk_size = 5)
+        two_workers = parallel.run_parallel(12, seed = 5, workers = 2, chunk_size = 2)
+        self.assertEqual(repr(one_worker), repr(two_workers))
+
+        totals = parallel.StatsTotals()
+        for stats in simulate.simulate(12, seed = 5):
+            totals.add(stats)
+        self.assertEqual(repr(one_worker), repr(totals))
+    def test_every_game_is_reported(self):
+        '''Tests that on_stats is called once for every game'''
+        seeds = []
+        parallel.run_parallel(7, seed = 1, workers = 2, chunk_size = 3, on_stats = lambda stats: seeds.append(stats.seed))
+        self.assertEqual(sorted(seeds), sorted(simulate.game_seed(1, game) for game in range(7)))
+
+if __name__ == '__main__':
+    unittest.main()
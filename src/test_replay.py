@@ -0,0 +1,66 @@
+from field_class import GameOverError, InvalidMoveError
+from board import Board
+import replay
+import random
+import unittest
+
+def record_game(seed: int, max_ticks: int = 2000, keyframe_interval: int = 50) -> tuple[replay.Recorder, list]:
+    '''Records a game of random moves, returning the recorder and the field after every tick'''
+    rand = random.Random(seed)
+    recorder = replay.Recorder(replay.new_field(6, 13, seed), seed, keyframe_interval)
+    fields = [None]
+    try:
+        while len(fields) <= max_ticks:
+            field = recorder.field
+            if field.need_new_faller and not field.matching:
+                recorder.create_faller()
+            move = rand.choice([recorder.move_faller_left, recorder.move_faller_right, recorder.rotate_faller, None, None])
+            for action in (move, lambda: recorder.pass_time(rand.random() < 0.1)):
+                try:
+                    if action is not None:
+                        action()
+                except InvalidMoveError:
+                    pass
+            fields.append([column[:] for column in field.field])
+    except GameOverError:
+        pass
+    return recorder, fields
+
+class ReplayTest(unittest.TestCase):
+    def test_playback_matches_recording(self):
+        '''Tests that playing a replay back gives the same field as the game that was recorded'''
+        for seed in range(5):
+            recorder, fields = record_game(seed)
+            recorded = replay.Replay(recorder.to_bytes())
+            self.assertEqual(recorded.play().field, recorder.field.field)
+            self.assertEqual(recorded.play(40).field, fields[40])
+    def test_values_that_dont_fit(self):
+        '''Tests that a seed or keyframe interval that can't be saved is refused before the game is recorded'''
+        for seed, keyframe_interval in [(-5, 50), (2 ** 64, 50), (1, 70000), (1, 0)]:
+            with self.assertRaises(ValueError):
+                replay.Recorder(replay.new_field(6, 13, 1), seed, keyframe_interval)
+        replay.Recorder(replay.new_field(6, 13, 1), 2 ** 64 - 1, 65535).to_bytes()
+    def test_keyframes(self):
+        '''Tests that each keyframe holds the field at its tick'''
+        recorder, fields = record_game(1)
+        recorded = replay.Replay(recorder.to_bytes())
+        self.assertEqual(len(recorded.keyframes), recorded.ticks // 50)
+        tick, board = recorded.keyframe(120)
+        self.assertEqual(tick, 100)
+        self.assertEqual(board, Board.from_field(fields[100]))
+        self.assertEqual(recorded.keyframe(10), (0, Board(6, 13)))
+    def test_about_a_byte_per_input(self):
+        '''Tests that a replay without keyframes is its header and one byte for each call made to the field'''
+        recorder, fields = record_game(2, keyframe_interval = 60000)
+        data = recorder.to_bytes()
+        self.assertEqual(len(data), replay.HEADER.size + len(recorder.events))
+        self.assertLess(len(recorder.events), 3 * len(fields))
+    def test_bad_replay(self):
+        '''Tests that data that isn't a replay is rejected'''
+        with self.assertRaises(replay.ReplayError):
+            replay.Replay(b'CRP')
+        with self.assertRaises(replay.ReplayError):
+            replay.Replay(b'NOPE' + bytes(replay.HEADER.size))
+
+if __name__ == '__main__':
+    unittest.main()
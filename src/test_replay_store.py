@@ -0,0 +1,68 @@
+from replay_store import ReplayStore, ReplayWriter, StoreError
+from test_replay import record_game
+import os
+import tempfile
+import unittest
+
+class ReplayStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.store')
+    def tearDown(self):
+        self.directory.cleanup()
+    def test_append_and_read(self):
+        '''Tests that games can be read back by number and by id, across several index blocks and writers'''
+        recorders = [record_game(seed, max_ticks = 200)[0] for seed in range(5)]
+        with ReplayWriter(self.path, entries_per_block = 2) as writer:
+            for seed, recorder in enumerate(recorders[:3]):
+                writer.append(100 + seed, recorder.to_bytes(), seed * 10)
+        with ReplayWriter(self.path) as writer:
+            for seed, recorder in enumerate(recorders[3:], 3):
+                writer.append(100 + seed, recorder.to_bytes(), seed * 10)
+
+        with ReplayStore(self.path) as store:
+            self.assertEqual(len(store), 5)
+            self.assertEqual(len(store.blocks), 3)
+            self.assertEqual(store.entry(4).game_id, 104)
+            self.assertEqual(store.find(103).score, 30)
+            self.assertIsNone(store.find(7))
+            self.assertEqual(store.replay(2).play().field, recorders[2].field.field)
+            with self.assertRaises(IndexError):
+                store.entry(5)
+
+            for number, (entry, data) in enumerate(store):
+                self.assertEqual(bytes(data), recorders[number].to_bytes())
+                data.release()
+    def test_find_by_id(self):
+        '''Tests that games are found by id through the id table and among the games appended after it'''
+        data = record_game(0, max_ticks = 20)[0].to_bytes()
+        ids = [50, 7, 93, 7, 12, 50, 61]
+        with ReplayWriter(self.path, entries_per_block = 3) as writer:
+            for number, game_id in enumerate(ids[:5]):
+                writer.append(game_id, data, number)
+
+        writer = ReplayWriter(self.path)
+        for number, game_id in enumerate(ids[5:], 5):
+            writer.append(game_id, data, number)
+        writer.file.flush()
+        with ReplayStore(self.path) as store:
+            self.assertEqual(store.ids_count, 5)
+            for game_id in ids:
+                self.assertEqual(store.find(game_id).score, ids.index(game_id))
+            self.assertIsNone(store.find(8))
+            self.assertIsNone(store.find(100))
+        writer.close()
+
+        with ReplayStore(self.path) as store:
+            self.assertEqual(store.ids_count, 7)
+            self.assertEqual(store.find(61).score, 6)
+            self.assertEqual(store.find(50).score, 0)
+    def test_not_a_store(self):
+        '''Tests that a file that isn't a store is rejected'''
+        with open(self.path, 'wb') as store_file:
+            store_file.write(b'CRPL' + bytes(100))
+        with self.assertRaises(StoreError):
+            ReplayStore(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
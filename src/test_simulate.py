@@ -0,0 +1,22 @@
+import simulate
+import unittest
+
+class SimulateTest(unittest.TestCase):
+    def test_same_seed_same_games(self):
+        '''Tests that simulating with the same seed plays the same games'''
+        self.assertEqual(simulate.simulate(5, seed = 3), simulate.simulate(5, seed = 3))
+    def test_stats_of_each_game(self):
+        '''Tests that each game ends on its own and reports how it went'''
+        games = simulate.simulate(5, simulate.idle_policy, seed = 0)
+        self.assertEqual([stats.seed for stats in games], [simulate.game_seed(0, game) for game in range(5)])
+        for stats in games:
+            self.assertTrue(0 < stats.ticks < 100000)
+            self.assertTrue(0 < stats.pieces <= stats.ticks)
+            self.assertTrue(stats.max_cascade <= stats.cleared)
+    def test_max_ticks(self):
+        '''Tests that a game stops after max_ticks ticks'''
+        stats = simulate.play_game(simulate.random_policy, 0, 20)
+        self.assertEqual(stats.ticks, 20)
+
+if __name__ == '__main__':
+    unittest.main()
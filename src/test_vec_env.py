@@ -0,0 +1,93 @@
+from field_class import Field, GameOverError, InvalidMoveError
+from board import Board, color_letter
+import vec_env
+import columns_logic
+import random
+import unittest
+
+class VecColumnsEnvTest(unittest.TestCase):
+    def _step_field(self, field: Field, colors, col_pick: float, action: int) -> int:
+        '''Does one step of the environment to a Field and returns the number of squares it cleared'''
+        cleared = 0
+        try:
+            if field.need_new_faller and not field.matching:
+                open_cols = [col for col in range(field.cols) if '   ' in field.field[col]]
+                col = open_cols[int(col_pick * len(open_cols))] if open_cols else None
+                field.create_faller(' '.join(color_letter(int(code)) for code in reversed(colors)), col)
+
+            try:
+                if action == vec_env.LEFT:
+                    field.move_faller_left()
+                elif action == vec_env.RIGHT:
+                    field.move_faller_right()
+                elif action == vec_env.ROTATE:
+                    field.rotate_faller()
+            except InvalidMoveError:
+                pass
+
+            for tick in range(2 if action == vec_env.DROP else 1):
+                if field.need_new_faller:
+                    cleared += sum(square[0] == '*' for column in field.field for square in column)
+                field.pass_time()
+        except GameOverError:
+            pass
+        return cleared
+    def _check_same_as_field(self, n_games: int, cols: int, rows: int, steps: int, seed: int):
+        '''Tests that every game in the environment plays exactly like a Field given the same fallers and actions'''
+        env = vec_env.VecColumnsEnv(n_games, cols, rows, seed = seed)
+        fields = [Field(columns_logic.create_empty_state(rows, cols)) for game in range(n_games)]
+        rand = random.Random(seed)
+        for step in range(steps):
+            actions = [rand.choice([vec_env.NONE, vec_env.LEFT, vec_env.RIGHT, vec_env.ROTATE, vec_env.DROP]) for game in range(n_games)]
+            cleared = [
+                self._step_field(field, env.next_colors[game], env.next_col_pick[game], actions[game]) if not field.game_over else 0
+                for game, field in enumerate(fields)
+            ]
+            boards, rewards, done = env.step(actions)
+            for game, field in enumerate(fields):
+                self.assertEqual(bytes(boards[game]), bytes(Board.from_field(field.field).cells), f'game {game}, step {step}')
+                self.assertEqual(rewards[game], cleared[game])
+                self.assertEqual(done[game], field.game_over)
+                self.assertEqual(env.need_new_faller[game], field.need_new_faller)
+                self.assertEqual(env.matching[game], field.matching)
+        return env
+    @unittest.skipUnless(vec_env.HAVE_NUMPY, 'NumPy is not installed')
+    def test_same_as_field(self):
+        '''Tests the environment against Fields on the normal field size'''
+        env = self._check_same_as_field(16, 6, 13, 400, 0)
+        self.assertTrue(env.game_over.any())
+    @unittest.skipUnless(vec_env.HAVE_NUMPY, 'NumPy is not installed')
+    def test_same_as_field_small(self):
+        '''Tests the environment against Fields on small fields, where games often end with a faller that doesn't fit'''
+        for cols, rows in [(3, 4), (4, 6), (5, 3)]:
+            env = self._check_same_as_field(24, cols, rows, 80, cols * rows)
+            self.assertTrue(env.game_over.all())
+    @unittest.skipUnless(vec_env.HAVE_NUMPY, 'NumPy is not installed')
+    def test_reset(self):
+        '''Tests that only the games that are reset start over'''
+        env = vec_env.VecColumnsEnv(4, 3, 4, seed = 1)
+        while not env.game_over[0]:
+            env.step([vec_env.DROP] * 4)
+        over = env.game_over.copy()
+        boards = env.reset([0])
+        self.assertFalse(env.game_over[0])
+        self.assertFalse(boards[0].any())
+        self.assertEqual(list(env.game_over[1:]), list(over[1:]))
+    @unittest.skipUnless(vec_env.HAVE_NUMPY, 'NumPy is not installed')
+    def test_delete_and_drop(self):
+        '''Tests that deleting matches and dropping squares work on a stack of boards the same way as on a Field'''
+        rand = random.Random(2)
+        for i in range(50):
+            field = columns_logic.create_empty_state(7, 4)
+            for column in field:
+                for row in range(7):
+                    column[row] = rand.choice(['   ', '   ', ' R ', '*G*', '[B]', ' Y '])
+            expected = Field([column[:] for column in field])
+            expected.delete_matches()
+            expected.drop_everything()
+            board = vec_env.np.frombuffer(Board.from_field(field).cells, dtype = vec_env.np.uint8).reshape(1, 4, 7)
+            result = vec_env.drop_everything(vec_env.delete_matches(board))
+            self.assertEqual(bytes(result[0]), bytes(Board.from_field(expected.field).cells))
+
+if __name__ == '__main__':
+    unittest.main()
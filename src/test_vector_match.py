@@ -0,0 +1,46 @@
+from field_class import Field
+import vector_match
+import columns_logic
+import random
+import unittest
+
+class VectorMatchTest(unittest.TestCase):
+    def _create_random_field(self, rand: random.Random, rows: int, cols: int):
+        '''Creates a random field where most squares have one of three colors'''
+        field = columns_logic.create_empty_state(rows, cols)
+        for column in field:
+            for row in range(rows):
+                column[row] = rand.choice([' R ', ' G ', ' B ', '[B]', '   '])
+        return field
+    def _field_matches(self, field: list[list[str]]):
+        '''Returns the field after Field.match_squares'''
+        field = Field([column[:] for column in field])
+        field.match_squares()
+        return field.field
+    @unittest.skipUnless(vector_match.HAVE_NUMPY, 'NumPy is not installed')
+    def test_same_matches_as_field(self):
+        '''Tests that the array matcher marks the same squares as Field.match_squares'''
+        rand = random.Random(0)
+        for size in [(13, 6), (4, 5), (20, 11), (2, 2)]:
+            for i in range(20):
+                field = self._create_random_field(rand, *size)
+                matched = vector_match.array_to_field(vector_match.match_squares(vector_match.field_to_array(field)))
+                self.assertEqual(matched, self._field_matches(field))
+    @unittest.skipUnless(vector_match.HAVE_NUMPY, 'NumPy is not installed')
+    def test_stack_of_boards(self):
+        '''Tests that a stack of boards is matched the same as each board on its own'''
+        rand = random.Random(1)
+        fields = [self._create_random_field(rand, 13, 6) for i in range(10)]
+        boards = vector_match.np.stack([vector_match.field_to_array(field) for field in fields])
+        matched = vector_match.match_squares(boards)
+        for field, board in zip(fields, matched):
+            self.assertEqual(vector_match.array_to_field(board), self._field_matches(field))
+    def test_match_field_without_numpy(self):
+        '''Tests that the pure Python path marks the same squares as Field.match_squares'''
+        field = self._create_random_field(random.Random(2), 13, 6)
+        expected = self._field_matches(field)
+        vector_match.match_field(field, use_numpy = False)
+        self.assertEqual(field, expected)
+
+if __name__ == '__main__':
+    unittest.main()
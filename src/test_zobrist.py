@@ -0,0 +1,102 @@
+from field_class import Field, GameOverError, InvalidMoveError
+from zobrist import ZobristKeys, TranspositionTable
+from board import Board
+import columns_logic
+import random
+import unittest
+
+class ZobristTest(unittest.TestCase):
+    def _new_field(self, keys: ZobristKeys, engine = None) -> Field:
+        '''Returns an empty 6x13 field that keeps a hash'''
+        return Field(columns_logic.create_empty_state(13, 6), engine = engine, rand = random.Random(3), zobrist = keys)
+    def test_hash_kept_up_to_date(self):
+        '''Tests that the hash after every move and tick is the same as working it out from scratch'''
+        keys = ZobristKeys()
+        field = self._new_field(keys)
+        rand = random.Random(0)
+        moves = [field.move_faller_left, field.move_faller_right, field.rotate_faller, field.pass_time, field.pass_time]
+        try:
+            for tick in range(3000):
+                if field.need_new_faller and not field.matching:
+                    field.create_faller()
+                try:
+                    rand.choice(moves)()
+                except InvalidMoveError:
+                    pass
+                self.assertEqual(field.hash, keys.hash_field(field))
+        except GameOverError:
+            pass
+        self.assertEqual(field.hash, keys.hash_field(field))
+    def test_hash_when_squares_above_faller(self):
+        '''Tests that the hash follows a square above a faller that moves down with it'''
+        keys = ZobristKeys()
+        field = Field([['   '] * 7, [' X '] + ['   '] * 6], zobrist = keys)
+        field.create_faller('R G B', 0)
+        for tick in range(4):
+            field.pass_time()
+        field.move_faller_right()
+        field.pass_time()
+        self.assertEqual(field.field[1][:2], ['   ', ' X '])
+        self.assertEqual(field.hash, keys.hash_field(field))
+    def test_keys_dont_depend_on_order(self):
+        '''Tests that keys made with the same seed are the same whichever order they are asked for in'''
+        keys1 = ZobristKeys(5)
+        keys2 = ZobristKeys(5)
+        squares = [(col, row, square) for col in range(3) for row in range(4) for square in (' R ', '[R]', '*G*')]
+        first = [keys1.square(*square) for square in squares]
+        last = [keys2.square(*square) for square in reversed(squares)]
+        self.assertEqual(first, last[::-1])
+        self.assertEqual(len(set(first)), len(squares))
+        self.assertNotEqual(ZobristKeys(6).square(0, 0, ' R '), first[0])
+    def test_board_hash_same_as_field(self):
+        '''Tests that the hash of a board is the same as the hash of a field with the same squares and no faller'''
+        keys = ZobristKeys()
+        field = Field([[' R ', '*G*', '   '], ['   ', '[B]', '|Y|']])
+        self.assertEqual(keys.hash_board(Board.from_field(field.field)), keys.hash_field(field))
+        self.assertNotEqual(keys.result(3, 1), keys.result(1, 3))
+    def test_same_position_same_hash(self):
+        '''Tests that moving the faller away and back gives the hash it had before, and that moving it changes the hash'''
+        field = self._new_field(ZobristKeys())
+        self.assertEqual(field.hash, 0)
+        field.create_faller('R G B', 2)
+        field.pass_time()
+        field.pass_time()
+        before = field.hash
+        field.move_faller_left()
+        self.assertNotEqual(field.hash, before)
+        field.move_faller_right()
+        self.assertEqual(field.hash, before)
+        for i in range(3):
+            field.rotate_faller()
+        self.assertEqual(field.hash, before)
+    def test_no_keys_no_hash(self):
+        '''Tests that a field without keys doesn't keep a hash'''
+        field = Field(columns_logic.create_empty_state(13, 6))
+        field.create_faller('R G B', 2)
+        field.pass_time()
+        self.assertEqual(field.hash, 0)
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_store_and_get(self):
+        '''Tests that a value is only returned for its own hash and when it was searched deep enough'''
+        table = TranspositionTable(4)
+        table.store(0x35, 2, 'a')
+        self.assertEqual(table.get(0x35), 'a')
+        self.assertEqual(table.get(0x35, 2), 'a')
+        self.assertIsNone(table.get(0x35, 3))
+        self.assertIsNone(table.get(0x45)) # same slot, different hash
+    def test_replacement(self):
+        '''Tests that a shallower value doesn't replace a deeper one from the same search, but does from an older search'''
+        table = TranspositionTable(4)
+        table.store(0x35, 3, 'deep')
+        table.store(0x45, 1, 'shallow')
+        self.assertEqual(table.get(0x35), 'deep')
+        table.store(0x45, 3, 'as deep')
+        self.assertEqual(table.get(0x45), 'as deep')
+        table.new_search()
+        table.store(0x55, 0, 'newer')
+        self.assertEqual(table.get(0x55), 'newer')
+        self.assertEqual(len(table), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+# Plays many games of Columns at once with NumPy, for training agents.
+# Every game is one (cols, rows) slice of an array of square codes (see board.py),
+# and each step does for every game what the game loop does for one Field on each tick:
+# create a faller if one is needed, do the action, and pass time.
+from board import FALLING, LANDED, FROZEN, MATCHED, STATE_SHIFT, COLOR_MASK, EMPTY
+from vector_match import find_matches
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+
+COLUMNS = 6
+ROWS = 13
+
+# what an agent can do on each step
+NONE = 0
+LEFT = 1
+RIGHT = 2
+ROTATE = 3
+DROP = 4 # passes time twice, the same as pressing down in the game
+
+NUM_COLORS = 7 # color codes 1 to 7 are the game colors
+
+def _compact(boards: 'np.ndarray', keep: 'np.ndarray') -> 'np.ndarray':
+    '''
+    Returns boards where, in each column, the squares that are not kept are removed
+    and everything above them falls down to fill the gaps, the same way as Field._compact_column
+    '''
+    order = np.argsort(keep, axis = -1, kind = 'stable') # the removed squares first, then the kept ones, in order
+    compacted = np.take_along_axis(boards, order, axis = -1)
+    removed = (~keep).sum(axis = -1, keepdims = True)
+    compacted[np.arange(boards.shape[-1]) < removed] = EMPTY
+    return compacted
+
+def delete_matches(boards: 'np.ndarray') -> 'np.ndarray':
+    '''Returns boards with every matched square deleted, the same way as Field.delete_matches'''
+    return _compact(boards, boards >> STATE_SHIFT != MATCHED)
+
+def drop_everything(boards: 'np.ndarray') -> 'np.ndarray':
+    '''
+    Returns boards with the empty squares under the top frozen square of each column removed,
+    the same way as Field.drop_everything
+    '''
+    frozen = (boards >> STATE_SHIFT == FROZEN) & (boards & COLOR_MASK != EMPTY)
+    has_frozen = frozen.any(axis = -1, keepdims = True)
+    top_frozen = frozen.argmax(axis = -1)[..., None]
+    keep = (np.arange(boards.shape[-1]) < top_frozen) | (boards != EMPTY) | ~has_frozen
+    return _compact(boards, keep)
+
+def mark_matches(boards: 'np.ndarray'):
+    '''Marks every square in a match as matched, in place'''
+    matched = find_matches(boards)
+    boards[matched] = (MATCHED << STATE_SHIFT) | (boards[matched] & COLOR_MASK)
+
+class VecColumnsEnv:
+    '''
+    N games stepped together. All of the state is kept in arrays with one entry per game:
+    the field with the faller in it (the observation) and without it, the faller's colors, state, column,
+    spot and number of squares in the field, and the need_new_faller, matching and game_over flags of Field.
+    The games follow the same rules as Field, including its odd cases, so each one plays exactly like a Field
+    given the same fallers.
+    '''
+    def __init__(self, n_games: int, cols: int = COLUMNS, rows: int = ROWS, seed: int = None) -> None:
+        '''Initializes variables'''
+        self.n_games = n_games
+        self.cols = cols
+        self.rows = rows
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((n_games, cols, rows), dtype = np.uint8)
+        self.boards_wo_faller = np.zeros_like(self.boards)
+        self.faller_colors = np.zeros((n_games, 3), dtype = np.uint8) # bottom square first
+        self.faller_state = np.full(n_games, FALLING, dtype = np.uint8) # the state the faller's squares are drawn in
+        self.faller_col = np.zeros(n_games, dtype = np.int64)
+        self.faller_spot = np.zeros(n_games, dtype = np.int64)
+        self.faller_num = np.zeros(n_games, dtype = np.int64)
+        self.landed = np.zeros(n_games, dtype = bool)
+        self.frozen = np.zeros(n_games, dtype = bool)
+        self.has_faller = np.zeros(n_games, dtype = bool)
+        self.need_new_faller = np.ones(n_games, dtype = bool)
+        self.matching = np.ones(n_games, dtype = bool)
+        self.game_over = np.zeros(n_games, dtype = bool)
+        # the colors of each game's next faller, bottom square first, and where among the open columns it goes (0 to 1)
+        self.next_colors = np.zeros((n_games, 3), dtype = np.uint8)
+        self.next_col_pick = np.zeros(n_games)
+        self._choose_next(np.arange(n_games))
+    def reset(self, games: 'np.ndarray' = None) -> 'np.ndarray':
+        '''Starts the given games (every game if None) over with an empty field and returns the observation'''
+        games = np.arange(self.n_games) if games is None else np.asarray(games)
+        self.boards[games] = EMPTY
+        self.boards_wo_faller[games] = EMPTY
+        self.has_faller[games] = False
+        self.landed[games] = False
+        self.frozen[games] = False
+        self.need_new_faller[games] = True
+        self.matching[games] = True
+        self.game_over[games] = False
+        return self.boards
+    def _choose_next(self, games: 'np.ndarray'):
+        '''Chooses the next faller of some games'''
+        self.next_colors[games] = self.rng.integers(1, NUM_COLORS + 1, (len(games), 3))
+        self.next_col_pick[games] = self.rng.random(len(games))
+    def _faller_code(self, games: 'np.ndarray', square: int) -> 'np.ndarray':
+        '''Returns the code of one square of the faller of each game, counting from the bottom'''
+        return (self.faller_state[games] << STATE_SHIFT) | self.faller_colors[games, square]
+    def _set_squares(self, boards: 'np.ndarray', games: 'np.ndarray', cols: 'np.ndarray', rows: 'np.ndarray', codes, where: 'np.ndarray'):
+        '''Sets one square of each game where where is True, wrapping negative rows around the same way as a list'''
+        games = games[where]
+        rows = rows[where] % self.rows
+        boards[games, cols[where], rows] = codes[where] if isinstance(codes, np.ndarray) else codes
+    def step(self, actions: 'np.ndarray') -> tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        '''
+        Does one step of every game that isn't over: creates a faller if one is needed, does the action, and passes time.
+        Returns the observation (the boards array itself, not a copy), the number of squares each game cleared,
+        and which games are over.
+        '''
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.n_games, dtype = np.int64)
+
+        self._create_fallers(np.flatnonzero(self.need_new_faller & ~self.matching & ~self.game_over))
+
+        playing = ~self.game_over & ~self.need_new_faller
+        self._move(np.flatnonzero(playing & (actions == LEFT)), -1)
+        self._move(np.flatnonzero(playing & (actions == RIGHT)), 1)
+        self._rotate(np.flatnonzero(playing & (actions == ROTATE)))
+
+        self._pass_time(rewards)
+        self._pass_time(rewards, actions == DROP)
+        return self.boards, rewards, self.game_over.copy()
+    def _create_fallers(self, games: 'np.ndarray'):
+        '''Does Field.create_faller with the next faller of each game'''
+        open_cols = (self.boards[games] == EMPTY).any(axis = 2)
+        num_open = open_cols.sum(axis = 1)
+        self.game_over[games[num_open == 0]] = True
+        games = games[num_open > 0]
+        open_cols = open_cols[num_open > 0]
+        num_open = num_open[num_open > 0]
+
+        # the column is the pick-th open column, counting from the left
+        pick = (self.next_col_pick[games] * num_open).astype(np.int64)
+        cols = (np.cumsum(open_cols, axis = 1) <= pick[:, None]).sum(axis = 1)
+
+        new = games[~self.has_faller[games] | self.frozen[games]]
+        self.faller_colors[new] = self.next_colors[new]
+        self.faller_state[new] = FALLING
+        self.faller_spot[new] = 0
+        self.faller_num[new] = 0
+        self.landed[new] = False
+        self.frozen[new] = False
+        self.has_faller[new] = True
+
+        self.faller_col[games] = cols
+        self.need_new_faller[games] = False
+        self.matching[games] = False
+        self._choose_next(games)
+    def _change_faller_state(self, games: 'np.ndarray', cols: 'np.ndarray'):
+        '''Does Field._change_faller_state for the faller of each game, as if it were in the given column'''
+        spot = self.faller_spot[games]
+        below = np.minimum(spot, self.rows - 1)
+        two_below = np.minimum(spot + 1, self.rows - 1)
+        falls = (spot < self.rows - 1) & (self.boards[games, cols, below] == EMPTY) & (self.boards[games, cols, two_below] == EMPTY)
+        lands = ~falls & ~self.landed[games]
+        freezes = ~falls & ~lands
+
+        self.landed[games[falls]] = False
+        self.faller_state[games[falls]] = FALLING
+        self.landed[games[lands]] = True
+        self.faller_state[games[lands]] = LANDED
+        self.frozen[games[freezes]] = True
+        self.faller_state[games[freezes]] = FROZEN
+    def _move(self, games: 'np.ndarray', coldelta: int):
+        '''Does Field.move_faller_left or move_faller_right, doing nothing when the move is invalid'''
+        new_cols = self.faller_col[games] + coldelta
+        inside = (new_cols >= 0) & (new_cols < self.cols)
+        games = games[inside]
+        new_cols = new_cols[inside]
+
+        # the move is blocked if any square the faller would move into is frozen
+        spot = self.faller_spot[games] - 1
+        num = self.faller_num[games]
+        blocked = np.zeros(len(games), dtype = bool)
+        for i in range(3):
+            squares = self.boards_wo_faller[games, new_cols, (spot - i) % self.rows]
+            blocked |= (i < num) & (squares >> STATE_SHIFT == FROZEN) & (squares & COLOR_MASK != EMPTY)
+        games = games[~blocked]
+        new_cols = new_cols[~blocked]
+        spot = spot[~blocked]
+        num = num[~blocked]
+        old_cols = self.faller_col[games]
+
+        self._change_faller_state(games, new_cols)
+        below = self.faller_spot[games]
+        falls = (below < self.rows) & (self.boards_wo_faller[games, new_cols, np.minimum(below, self.rows - 1)] == EMPTY)
+        self.landed[games[falls]] = False
+        self.faller_state[games[falls]] = FALLING
+
+        for i in range(3):
+            rows = spot - i
+            old = self.boards_wo_faller[games, old_cols, rows % self.rows]
+            self._set_squares(self.boards, games, old_cols, rows, old, i < num)
+        for i in range(3):
+            self._set_squares(self.boards, games, new_cols, spot - i, self._faller_code(games, i), i < num)
+        self.faller_col[games] = new_cols
+    def _rotate(self, games: 'np.ndarray'):
+        '''Does Field.rotate_faller'''
+        self.faller_colors[games] = np.roll(self.faller_colors[games], -1, axis = 1)
+        spot = self.faller_spot[games] - 1
+        cols = self.faller_col[games]
+        for i in range(3):
+            self._set_squares(self.boards, games, cols, spot - i, self._faller_code(games, i), i < self.faller_num[games])
+    def _pass_time(self, rewards: 'np.ndarray', which: 'np.ndarray' = None):
+        '''Does Field.pass_time for every game that isn't over, or only the games where which is True'''
+        playing = ~self.game_over if which is None else ~self.game_over & which
+        self._match(np.flatnonzero(playing & self.need_new_faller), rewards)
+
+        games = np.flatnonzero(playing & ~self.need_new_faller)
+        self._change_faller_state(games, self.faller_col[games])
+        games = games[~self.matching[games]]
+        landed = self.landed[games]
+        frozen = self.frozen[games]
+        self._faller_drop(games[~landed & ~frozen])
+        self._faller_freeze(games[frozen])
+        self._faller_land(games[landed & ~frozen])
+    def _faller_drop(self, games: 'np.ndarray'):
+        '''Does Field._faller_drop'''
+        cols = self.faller_col[games]
+        spot = self.faller_spot[games]
+        num = self.faller_num[games]
+
+        entering = num < 3
+        for i in range(3):
+            self._set_squares(self.boards, games, cols, spot - i, self._faller_code(games, i), entering & (i <= num))
+
+        # a faller that is all the way in moves down by shifting everything above the square under it down one
+        moving = games[~entering]
+        if len(moving):
+            columns = self.boards[moving, cols[~entering]]
+            rows = np.arange(self.rows)
+            sources = np.where(rows <= spot[~entering, None], rows - 1, rows)
+            shifted = np.take_along_axis(columns, np.maximum(sources, 0), axis = 1)
+            shifted[sources < 0] = EMPTY
+            self.boards[moving, cols[~entering]] = shifted
+
+        self.faller_num[games[entering]] += 1
+        self.faller_spot[games] += 1
+    def _faller_land(self, games: 'np.ndarray'):
+        '''Does Field._faller_land'''
+        self.faller_num[games[self.faller_num[games] < 3]] += 1
+        cols = self.faller_col[games]
+        spot = self.faller_spot[games]
+        self._set_squares(self.boards, games, cols, spot - 3, EMPTY, spot - 3 >= 0)
+        self._change_faller_state_in_field(games)
+        self.faller_spot[games] += 1
+    def _change_faller_state_in_field(self, games: 'np.ndarray'):
+        '''Does Field._change_faller_state_in_field'''
+        cols = self.faller_col[games]
+        spot = self.faller_spot[games]
+        num = self.faller_num[games]
+        self._set_squares(self.boards, games, cols, spot, self._faller_code(games, 0), num == 0)
+        for i in range(3):
+            rows = spot - i
+            self._set_squares(self.boards, games, cols, rows, self._faller_code(games, i), (i < num) & (rows >= 0) & (rows < self.rows))
+    def _faller_freeze(self, games: 'np.ndarray'):
+        '''Does Field._faller_freeze'''
+        self.faller_spot[games] -= 1
+        self._change_faller_state_in_field(games)
+
+        outside = self.faller_num[games] < 3
+        for game in games[outside]:
+            self._check_game_over(game)
+
+        inside = games[~outside]
+        boards = self.boards[inside]
+        mark_matches(boards)
+        self.boards[inside] = boards
+        self.matching[inside] = (boards >> STATE_SHIFT == MATCHED).any(axis = (1, 2))
+
+        self.faller_num[games] += 1
+        self.boards_wo_faller[games] = self.boards[games]
+        self.need_new_faller[games] = True
+    def _check_game_over(self, game: int):
+        '''
+        Does what Field._faller_freeze does for a faller that froze before it was all the way in the field:
+        the rest of the faller is stacked on top of the field, matches are marked in the top rows,
+        and the game is over if anything is still above the field once the matches are deleted and dropped
+        '''
+        added = 3 - self.faller_num[game]
+        col = self.faller_col[game]
+        board = np.zeros((self.cols, self.rows + added), dtype = np.uint8)
+        board[:, added:] = self.boards[game]
+        for row in range(added):
+            board[col, added - 1 - row] = self._faller_code(np.array([game]), self.faller_num[game] + row)[0]
+
+        mark_matches(board[:, :self.rows])
+        settled = drop_everything(delete_matches(board))
+        if settled[:, :added].any():
+            self.game_over[game] = True
+        else:
+            board = drop_everything(board)
+
+        # Field._delete_extra_rows pops rows 0, 1, 2 one after another, which are rows 0, 2 and 4 of the taller field
+        kept = np.ones(self.rows + added, dtype = bool)
+        kept[[2 * row for row in range(added)]] = False
+        self.boards[game] = board[:, kept]
+    def _match(self, games: 'np.ndarray', rewards: 'np.ndarray'):
+        '''Does Field._match, adding the number of squares deleted to the rewards'''
+        boards = self.boards[games]
+        matched = boards >> STATE_SHIFT == MATCHED
+        has_matches = matched.any(axis = (1, 2))
+        self.matching[games[~has_matches]] = False
+
+        games = games[has_matches]
+        rewards[games] += matched[has_matches].sum(axis = (1, 2))
+        boards = delete_matches(boards[has_matches])
+        mark_matches(boards)
+        self.boards[games] = boards
+        self.boards_wo_faller[games] = boards
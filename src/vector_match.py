@@ -0,0 +1,75 @@
+# Finds matches with NumPy array operations instead of walking the field square by square.
+# Boards are arrays of square codes (see board.py) with the shape (cols, rows),
+# or (games, cols, rows) to match a whole stack of boards in one call.
+from board import Board, encode_square, decode_square, COLOR_MASK, STATE_SHIFT, MATCHED
+from line_index import LINE_DIRECTIONS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+
+def field_to_array(field: list[list[str]]) -> 'np.ndarray':
+    '''Returns a field of square strings as a (cols, rows) array of square codes'''
+    return np.array([[encode_square(square) for square in column] for column in field], dtype = np.uint8)
+
+def array_to_field(board: 'np.ndarray') -> list[list[str]]:
+    '''Returns a (cols, rows) array of square codes as a field of square strings'''
+    return [[decode_square(int(code)) for code in column] for column in board]
+
+def _window(board: 'np.ndarray', coldelta: int, rowdelta: int, step: int) -> 'np.ndarray':
+    '''
+    Returns the part of the board that is step squares away, in the given direction,
+    from every square a line of 3 can begin at
+    '''
+    cols, rows = board.shape[-2:]
+    col_start = max(0, -2 * coldelta) + step * coldelta
+    col_end = cols - max(0, 2 * coldelta) + step * coldelta
+    row_start = max(0, -2 * rowdelta) + step * rowdelta
+    row_end = rows - max(0, 2 * rowdelta) + step * rowdelta
+    return board[..., col_start:col_end, row_start:row_end]
+
+def find_matches(boards: 'np.ndarray') -> 'np.ndarray':
+    '''Returns a boolean array that is True for every square in a line of 3 or more of the same color'''
+    colors = boards & COLOR_MASK
+    matched = np.zeros(colors.shape, dtype = bool)
+    if min(colors.shape[-2:]) == 0:
+        return matched
+
+    for coldelta, rowdelta in LINE_DIRECTIONS:
+        first = _window(colors, coldelta, rowdelta, 0)
+        second = _window(colors, coldelta, rowdelta, 1)
+        third = _window(colors, coldelta, rowdelta, 2)
+        if first.size == 0:
+            continue # the board is too small for a line of 3 in this direction
+
+        # a line of 4 or more is found as overlapping lines of 3
+        begins = (first != 0) & (first == second) & (second == third)
+        for step in range(3):
+            _window(matched, coldelta, rowdelta, step)[begins] = True
+
+    return matched
+
+def match_squares(boards: 'np.ndarray') -> 'np.ndarray':
+    '''Returns a copy of the boards with every square that is part of a match marked as matched'''
+    matched = find_matches(boards)
+    result = boards.copy()
+    result[matched] = (MATCHED << STATE_SHIFT) | (boards[matched] & COLOR_MASK)
+    return result
+
+def match_field(field: list[list[str]], use_numpy: bool = HAVE_NUMPY):
+    '''
+    Puts stars around the colors that are in a match, in place, the same way Field.match_squares does.
+    If use_numpy is False, the pure Python Board is used instead.
+    '''
+    if use_numpy:
+        matched = array_to_field(match_squares(field_to_array(field)))
+    else:
+        board = Board.from_field(field)
+        board.match_squares()
+        matched = board.field
+
+    for column, matched_column in zip(field, matched):
+        column[:] = matched_column
@@ -0,0 +1,107 @@
+from board import decode_square
+import hashlib
+
+KEY_BITS = 64
+TABLE_BITS = 16 # the transposition table has 2 ** TABLE_BITS slots
+
+class ZobristKeys:
+    '''
+    The random keys that a field's hash is made of. The hash of a field is the XOR of the key of every square
+    (by its column, row and square string, with empty squares adding nothing) and the key of the active faller.
+    Each key is worked out from the seed and what it is the key of, so the keys, and the hashes,
+    are the same every run no matter which keys are asked for first.
+    '''
+    def __init__(self, seed: int = 0) -> None:
+        '''Initializes variables'''
+        self.seed = seed
+        self.squares = {} # keys by (col, row, square string), kept so each one is only worked out once
+        self.faller_keys = {} # keys by ('col', col), ('spot', faller_spot) or (position in the faller, square string)
+        self.result_keys = {} # keys by (squares cleared, chain length)
+    def _new_key(self, part: tuple) -> int:
+        '''Works out the key of a part of the field from the seed'''
+        digest = hashlib.blake2b(repr((self.seed, part)).encode(), digest_size = KEY_BITS // 8).digest()
+        return int.from_bytes(digest, 'big')
+    def square(self, col: int, row: int, square: str) -> int:
+        '''Returns the key of a square string at (col, row)'''
+        if square == '   ':
+            return 0
+        key = self.squares.get((col, row, square))
+        if key is None:
+            key = self.squares[(col, row, square)] = self._new_key(('square', col, row, square))
+        return key
+    def _faller_key(self, part: tuple) -> int:
+        '''Returns the key of a part of the faller'''
+        key = self.faller_keys.get(part)
+        if key is None:
+            key = self.faller_keys[part] = self._new_key(('faller',) + part)
+        return key
+    def faller(self, faller) -> int:
+        '''Returns the key of a faller's colors and states, column and spot, or 0 if there is no faller still moving'''
+        if faller == [] or faller.frozen:
+            return 0
+        key = self._faller_key(('col', faller.faller_col)) ^ self._faller_key(('spot', faller.faller_spot))
+        for position, square in enumerate(faller.faller):
+            key ^= self._faller_key((position, square))
+        return key
+    def hash_field(self, field) -> int:
+        '''Works out the hash of a whole Field from scratch'''
+        key = self.faller(field.faller)
+        for col, column in enumerate(field.field):
+            for row, square in enumerate(column):
+                key ^= self.square(col, row, square)
+        return key
+
+    def code(self, col: int, row: int, code: int) -> int:
+        '''Returns the key of a square code (see board.py) at (col, row), the same as the key of its square string'''
+        return self.square(col, row, decode_square(code))
+    def hash_board(self, board) -> int:
+        '''Works out the hash of a board.Board from scratch, the same as the hash of a Field with those squares and no faller'''
+        key = 0
+        rows = board.rows
+        for i, code in enumerate(board.cells):
+            if code:
+                key ^= self.code(i // rows, i % rows, code)
+        return key
+    def result(self, cleared: int, chain: int) -> int:
+        '''Returns the key of how many squares a placement cleared and in how long a chain'''
+        key = self.result_keys.get((cleared, chain))
+        if key is None:
+            key = self.result_keys[(cleared, chain)] = self._new_key(('result', cleared, chain))
+        return key
+
+class TranspositionTable:
+    '''
+    A fixed number of slots that remember a value for a field hash, each slot chosen by the low bits of the hash.
+    When two hashes want the same slot, the new one replaces the old one if the old one is from an earlier search,
+    or if the new value was searched at least as deep.
+    '''
+    def __init__(self, bits: int = TABLE_BITS) -> None:
+        '''Initializes variables'''
+        self.mask = (1 << bits) - 1
+        size = 1 << bits
+        self.hashes = [None] * size
+        self.depths = [0] * size
+        self.values = [None] * size
+        self.searches = [0] * size # which search each slot was stored in
+        self.search = 0
+    def new_search(self):
+        '''Lets everything stored so far be replaced by values from the next search, even shallower ones'''
+        self.search += 1
+    def store(self, key: int, depth: int, value):
+        '''Remembers the value of a field hash that was searched depth moves deep, if the replacement policy allows it'''
+        slot = key & self.mask
+        old = self.hashes[slot]
+        if old is None or old == key or self.searches[slot] != self.search or depth >= self.depths[slot]:
+            self.hashes[slot] = key
+            self.depths[slot] = depth
+            self.values[slot] = value
+            self.searches[slot] = self.search
+    def get(self, key: int, depth: int = 0):
+        '''Returns the value stored for a field hash if it was searched at least depth moves deep. Otherwise, returns None.'''
+        slot = key & self.mask
+        if self.hashes[slot] == key and self.depths[slot] >= depth:
+            return self.values[slot]
+        return None
+    def __len__(self) -> int:
+        '''Returns the number of slots in use'''
+        return sum(key is not None for key in self.hashes)